@@ -0,0 +1,141 @@
+"""
+Token authentication that remembers which user a token belongs to.
+
+DRF's ``TokenAuthentication`` looks up ``Token`` joined to ``User`` on every
+request. ``CachedTokenAuthentication`` keeps the result in a bounded
+in-process LRU and, if ``TOKEN_AUTH_CACHE['SHARED_CACHE']`` names a cache
+alias, in that shared cache as well, so a token seen by any worker skips the
+database. Entries expire after ``TIMEOUT`` seconds.
+
+Deleting or changing a token and saving its user (e.g. deactivating it)
+drop the cached entries through signals (see api/signals.py). Other
+processes' LRUs do not hear those signals and forget the entry within
+``TIMEOUT`` at most; keep it short.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+DEFAULTS = {
+    'MAX_ENTRIES': 10000,
+    'TIMEOUT': 60,
+    'SHARED_CACHE': None,
+}
+
+
+class TokenCache:
+    """token key -> (user, token) with LRU eviction, a TTL and hit/miss counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires, (user, token))
+        self.hits = self.shared_hits = self.misses = self.evictions = 0
+
+    @property
+    def options(self):
+        return {**DEFAULTS, **getattr(settings, 'TOKEN_AUTH_CACHE', {})}
+
+    def _shared(self):
+        alias = self.options['SHARED_CACHE']
+        return caches[alias] if alias else None
+
+    def _shared_key(self, key):
+        return f"authtoken:{key}"
+
+    def _remember(self, key, value):
+        options = self.options
+        with self._lock:
+            self._entries[key] = (time.monotonic() + options['TIMEOUT'], value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > options['MAX_ENTRIES']:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, key):
+        """The cached ``(user, token)`` for a key, or None. Callers get their own copy."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(entry[1])
+                del self._entries[key]
+
+        shared = self._shared()
+        value = shared.get(self._shared_key(key)) if shared is not None else None
+        if value is not None:
+            self._remember(key, value)
+            with self._lock:
+                self.shared_hits += 1
+            return copy.deepcopy(value)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, user, token):
+        # Keep a private copy: the caller's user collects per-request state
+        value = copy.deepcopy((user, token))
+        self._remember(key, value)
+        shared = self._shared()
+        if shared is not None:
+            shared.set(self._shared_key(key), value, self.options['TIMEOUT'])
+
+    def invalidate(self, keys):
+        keys = list(keys)
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+        shared = self._shared()
+        if shared is not None and keys:
+            shared.delete_many([self._shared_key(key) for key in keys])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "maxEntries": self.options['MAX_ENTRIES'],
+                "hits": self.hits,
+                "sharedHits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hitRate": (self.hits + self.shared_hits) / lookups if lookups else None,
+            }
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Drop-in replacement for ``TokenAuthentication`` backed by ``token_cache``."""
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+
+        # The user's customer and vendor rows come along, so role checks
+        # (api/roles.py) need no further queries
+        model = self.get_model()
+        try:
+            token = model.objects.select_related('user__customer', 'user__vendor').get(key=key)
+        except model.DoesNotExist:
+            raise AuthenticationFailed(_('Invalid token.'))
+        if not token.user.is_active:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+
+        token_cache.set(key, token.user, token)
+        return token.user, token
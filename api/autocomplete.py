@@ -0,0 +1,191 @@
+"""
+In-memory prefix index for search-box suggestions.
+
+Item names, vendor names and distinct category names are stored in a sorted
+array of normalized keys, one key per word position, so "piz" finds both
+"Pizza Roma" and "Margherita Pizza".  A lookup is two bisects plus a top-k
+selection by popularity over the matching slice.
+
+The index follows the catalog change journal (``CatalogChange``): every
+lookup applies the entries written since the last one, so additions and
+deletions from any worker show up on the next keystroke without a rebuild.
+Popularity (units ordered) is refreshed with a full rebuild every
+``POPULARITY_TTL`` seconds.
+"""
+import heapq
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+
+from django.db.models import Count, Sum
+
+from .catalog import changes_since, current_catalog_version
+from .models import Contain, Item, ItemCategory, Vendor
+
+POPULARITY_TTL = 600
+RESULT_CACHE_SIZE = 1024
+
+
+def normalize(text):
+    """Lowercase and strip accents so "Crème" and "creme" share a key."""
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).strip()
+
+
+def word_keys(label):
+    """Keys for every word position in a label: "green tea" -> "green tea", "tea"."""
+    words = normalize(label).split()
+    return [' '.join(words[i:]) for i in range(len(words))]
+
+
+class PrefixIndex:
+    """Sorted (key, kind, id) entries with popularity-ranked prefix lookups."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = []  # sorted list of (key, kind, id)
+        self._docs = {}  # (kind, id) -> {"label", "popularity", ...}
+        self._category_counts = {}  # category name -> number of items using it
+        self._results = {}  # (prefix, kinds, limit) -> suggestions
+        self._version = None
+        self._built_at = 0.0
+
+    # -- maintenance ---------------------------------------------------------
+
+    def _add(self, kind, object_id, label, popularity, **extra):
+        self._remove(kind, object_id)
+        self._docs[(kind, object_id)] = {"label": label, "popularity": popularity, **extra}
+        for key in word_keys(label):
+            insort(self._keys, (key, kind, object_id))
+
+    def _remove(self, kind, object_id):
+        doc = self._docs.pop((kind, object_id), None)
+        if doc is None:
+            return
+        for key in word_keys(doc["label"]):
+            i = bisect_left(self._keys, (key, kind, object_id))
+            if i < len(self._keys) and self._keys[i] == (key, kind, object_id):
+                del self._keys[i]
+
+    def _category_usage(self):
+        return dict(ItemCategory.objects.values('category__name')
+                    .annotate(items=Count('id')).values_list('category__name', 'items'))
+
+    def _set_category_counts(self, counts):
+        """Patch category entries to match ``counts`` (name -> items using it)."""
+        for name in self._category_counts.keys() - counts.keys():
+            self._remove('category', name)
+        for name, count in counts.items():
+            if self._category_counts.get(name) != count:
+                self._add('category', name, name, count)
+        self._category_counts = counts
+
+    def _rebuild(self):
+        """Full build: five queries, run at startup and when popularity expires."""
+        version = current_catalog_version()
+        sold = dict(Contain.objects.values('item_id').annotate(units=Sum('quantity'))
+                    .values_list('item_id', 'units'))
+
+        self._keys, self._docs = [], {}
+        vendor_popularity = {}
+        for item_id, name, vendor_id in Item.objects.values_list('id', 'name', 'vendor_id'):
+            popularity = sold.get(item_id, 0)
+            vendor_popularity[vendor_id] = vendor_popularity.get(vendor_id, 0) + popularity
+            self._docs[('item', item_id)] = {"label": name, "popularity": popularity, "vendorId": vendor_id}
+            self._keys.extend((key, 'item', item_id) for key in word_keys(name))
+
+        for vendor_id, name in Vendor.objects.values_list('id', 'name'):
+            self._docs[('vendor', vendor_id)] = {"label": name, "popularity": vendor_popularity.get(vendor_id, 0)}
+            self._keys.extend((key, 'vendor', vendor_id) for key in word_keys(name))
+
+        self._category_counts = self._category_usage()
+        for name, count in self._category_counts.items():
+            self._docs[('category', name)] = {"label": name, "popularity": count}
+            self._keys.extend((key, 'category', name) for key in word_keys(name))
+
+        self._keys.sort()
+        self._results = {}
+        self._version = version
+        self._built_at = time.monotonic()
+
+    def _apply_changes(self):
+        """Apply journal entries written since the last lookup (usually none: one query)."""
+        version, latest = changes_since(self._version)
+        if not latest:
+            return
+
+        wanted = {kind: [object_id for (k, object_id), deleted in latest.items() if k == kind and not deleted]
+                  for kind in ('item', 'vendor')}
+
+        items = {row[0]: row for row in Item.objects.filter(id__in=wanted['item'])
+                 .values_list('id', 'name', 'vendor_id')} if wanted['item'] else {}
+        vendors = dict(Vendor.objects.filter(id__in=wanted['vendor'])
+                       .values_list('id', 'name')) if wanted['vendor'] else {}
+
+        for (kind, object_id), deleted in latest.items():
+            if kind == 'item':
+                row = items.get(object_id)
+                if row is None:
+                    self._remove('item', object_id)
+                else:
+                    old = self._docs.get(('item', object_id), {})
+                    self._add('item', object_id, row[1], old.get("popularity", 0), vendorId=row[2])
+            elif kind == 'vendor':
+                if object_id in vendors:
+                    old = self._docs.get(('vendor', object_id), {})
+                    self._add('vendor', object_id, vendors[object_id], old.get("popularity", 0))
+                else:
+                    self._remove('vendor', object_id)
+
+        # Item and tag changes both move the per-category item counts
+        if any(kind in ('item', 'category') for kind, _ in latest):
+            self._set_category_counts(self._category_usage())
+
+        self._results = {}
+        self._version = version
+
+    def refresh(self):
+        with self._lock:
+            if self._version is None or time.monotonic() - self._built_at > POPULARITY_TTL:
+                self._rebuild()
+            else:
+                self._apply_changes()
+
+    # -- lookups -------------------------------------------------------------
+
+    def suggest(self, prefix, limit=10, kinds=('item', 'vendor', 'category')):
+        """Top ``limit`` entries whose name has a word starting with ``prefix``."""
+        prefix = ' '.join(normalize(prefix).split())
+        if not prefix:
+            return []
+        self.refresh()
+
+        cache_key = (prefix, tuple(kinds), limit)
+        with self._lock:
+            cached = self._results.get(cache_key)
+            if cached is not None:
+                return cached
+
+            lo = bisect_left(self._keys, (prefix,))
+            hi = bisect_left(self._keys, (prefix + '\U0010ffff',))
+            keys = self._keys
+            matches = {keys[i][1:] for i in range(lo, hi) if keys[i][1] in kinds}
+            top = heapq.nlargest(
+                limit, matches,
+                key=lambda entry: (self._docs[entry]["popularity"], -len(self._docs[entry]["label"]))
+            )
+            results = []
+            for kind, object_id in top:
+                suggestion = {"type": kind, **self._docs[(kind, object_id)]}
+                if kind != 'category':
+                    suggestion["id"] = object_id
+                results.append(suggestion)
+
+            if len(self._results) >= RESULT_CACHE_SIZE:
+                self._results = {}
+            self._results[cache_key] = results
+            return results
+
+
+autocomplete_index = PrefixIndex()
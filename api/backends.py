@@ -0,0 +1,50 @@
+"""
+Pluggable backends configured by a settings dict, e.g.::
+
+    CART_STORE = {
+        'BACKEND': 'api.cart_store.CacheCartStore',
+        'OPTIONS': {'cache': 'carts'},
+    }
+
+``LazyBackend`` stands in for the configured backend at module level.
+"""
+import threading
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.utils.module_loading import import_string
+
+
+def load_backend(setting, default):
+    """Instantiate the backend named by ``settings.<setting>`` (``default`` if unset)."""
+    config = getattr(settings, setting, {})
+    backend = import_string(config.get('BACKEND', default))
+    return backend(**config.get('OPTIONS', {}))
+
+
+class LazyBackend:
+    """
+    Proxy to the backend configured by ``settings.<setting>``, created on
+    first use (settings may not be ready at import) and again after the
+    setting changes, e.g. under ``override_settings``.
+    """
+
+    def __init__(self, setting, default):
+        self._setting = setting
+        self._default = default
+        self._backend = None
+        self._lock = threading.Lock()
+        setting_changed.connect(self._setting_changed, weak=False)
+
+    def _setting_changed(self, setting, **kwargs):
+        if setting == self._setting:
+            self._backend = None
+
+    def __getattr__(self, name):
+        backend = self._backend
+        if backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = load_backend(self._setting, self._default)
+                backend = self._backend
+        return getattr(backend, name)
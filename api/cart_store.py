@@ -0,0 +1,373 @@
+"""
+Where active carts live between requests.
+
+The backend is chosen by ``settings.CART_STORE``:
+
+``api.cart_store.CacheCartStore`` (default)
+    Keeps each cart as one entry in a Django cache (``OPTIONS['cache']``),
+    so adding, changing or removing a line costs no database queries. Carts
+    are written behind to ``Cart``/``CartItem``: a background thread persists
+    the carts this process changed every ``write_behind`` seconds (and at
+    exit), and checkout flushes the customer's cart before reading it. On a
+    cache miss the cart is loaded from the database. Use a cache every
+    worker shares (file-based locally) so all of them see the same cart.
+
+``api.cart_store.DatabaseCartStore``
+    Reads and writes ``Cart``/``CartItem`` directly on every call.
+
+Both take customer ids and describe a cart as ``(cart_id, [CartLine])`` in
+the order lines were added. The cache store edits a cart's entry under a
+lock taken with ``cache.add``, so concurrent edits of one cart all apply;
+the lock is atomic on caches whose ``add`` is (memcached, Redis, local
+memory), while the file-based cache only serializes the threads of one
+process. A cart whose cache entry is evicted before it is written behind
+loses the changes made since its last save. A flush writes only while the
+cart row is locked and the cache still holds the version it read, so it
+cannot bring back lines that checkout just ordered.
+"""
+import atexit
+import logging
+import threading
+import time
+import uuid
+from collections import namedtuple
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum, Window
+
+from .backends import LazyBackend
+from .models import Cart, CartItem, Item
+
+logger = logging.getLogger(__name__)
+
+# Seconds a cart edit may hold its lock before another worker may take it
+LOCK_TIMEOUT = 5
+LOCK_POLL = 0.005
+
+# ``line_id`` is the CartItem id, or None for a line not written to the database yet
+CartLine = namedtuple('CartLine', 'item_id quantity line_id')
+# ``lines`` are CartItems carrying item_name, item_price, vendor_name and subtotal
+PricedCart = namedtuple('PricedCart', 'cart_id lines total_items total_price')
+
+
+def priced_cart_items(queryset):
+    """
+    CartItem rows with the item's name and price, the vendor's name and the
+    line subtotal joined in, plus the totals of all the rows as window sums:
+    a whole cart with its totals in one query.
+    """
+    subtotal = ExpressionWrapper(F('item__price') * F('quantity'),
+                                 output_field=DecimalField(max_digits=12, decimal_places=2))
+    return (queryset
+            .annotate(item_name=F('item__name'), item_price=F('item__price'),
+                      vendor_name=F('item__vendor__name'), subtotal=subtotal,
+                      total_items=Window(Sum('quantity')), total_price=Window(Sum(subtotal)))
+            .order_by('id'))
+
+
+CART_OPERATIONS = ('add', 'set', 'remove')
+
+
+def apply_operations(quantities, operations):
+    """Apply ``(op, item_id, quantity)`` operations in order to ``{item_id: quantity}``."""
+    for op, item_id, quantity in operations:
+        if op == 'add':
+            quantities[item_id] = quantities.get(item_id, 0) + quantity
+        elif op == 'set':
+            quantities[item_id] = quantity
+        else:
+            quantities.pop(item_id, None)
+    return quantities
+
+
+class DatabaseCartStore:
+    """Carts read from and written to the database on every call."""
+
+    def __init__(self, **options):
+        pass
+
+    def read(self, customer_id):
+        cart, _ = Cart.objects.get_or_create(customer_id=customer_id)
+        lines = [CartLine(item_id, quantity, line_id) for line_id, item_id, quantity
+                 in CartItem.objects.filter(cart=cart).order_by('id').values_list('id', 'item_id', 'quantity')]
+        return cart.id, lines
+
+    def priced(self, customer_id):
+        """The cart at current prices, as a ``PricedCart``."""
+        cart, _ = Cart.objects.get_or_create(customer_id=customer_id)
+        lines = list(priced_cart_items(CartItem.objects.filter(cart=cart)))
+        if not lines:
+            return PricedCart(cart.id, [], 0, Decimal('0'))
+        return PricedCart(cart.id, lines, lines[0].total_items, lines[0].total_price)
+
+    def add(self, customer_id, item_id, quantity):
+        """Add ``quantity`` units of an item; returns the quantity now in the cart."""
+        cart, _ = Cart.objects.get_or_create(customer_id=customer_id)
+        cart_item, created = CartItem.objects.get_or_create(cart=cart, item_id=item_id,
+                                                            defaults={'quantity': quantity})
+        if not created:
+            cart_item.quantity += quantity
+            cart_item.save(update_fields=['quantity'])
+        return cart_item.quantity
+
+    def update(self, customer_id, item_id, quantity):
+        """Set a line's quantity; KeyError if the item is not in the cart."""
+        if not CartItem.objects.filter(cart__customer_id=customer_id, item_id=item_id).update(quantity=quantity):
+            raise KeyError(item_id)
+
+    def remove(self, customer_id, item_id):
+        """Drop a line; KeyError if the item is not in the cart."""
+        deleted, _ = CartItem.objects.filter(cart__customer_id=customer_id, item_id=item_id).delete()
+        if not deleted:
+            raise KeyError(item_id)
+
+    def clear(self, customer_id):
+        """Empty the cart; returns the number of lines removed."""
+        deleted, _ = CartItem.objects.filter(cart__customer_id=customer_id).delete()
+        return deleted
+
+    def apply(self, customer_id, operations):
+        """
+        Apply a batch of ``(op, item_id, quantity)`` operations (``add``,
+        ``set`` or ``remove``) in one transaction: one read of the lines
+        involved, one delete, one upsert.
+        """
+        item_ids = {item_id for _, item_id, _ in operations}
+        with transaction.atomic():
+            cart, _ = Cart.objects.select_for_update().get_or_create(customer_id=customer_id)
+            current = dict(CartItem.objects.filter(cart=cart, item_id__in=item_ids)
+                           .values_list('item_id', 'quantity'))
+            wanted = apply_operations(dict(current), operations)
+
+            removed = current.keys() - wanted.keys()
+            if removed:
+                CartItem.objects.filter(cart=cart, item_id__in=removed).delete()
+            CartItem.objects.bulk_create(
+                [CartItem(cart=cart, item_id=item_id, quantity=quantity)
+                 for item_id, quantity in wanted.items() if current.get(item_id) != quantity],
+                update_conflicts=True, unique_fields=['cart', 'item'], update_fields=['quantity'],
+            )
+
+    def flush(self, customer_id):
+        """Make sure the database holds the cart (nothing to do here)."""
+
+    def forget(self, customer_id):
+        """Drop any copy of the cart held outside the database, e.g. after checkout."""
+
+
+class CacheCartStore(DatabaseCartStore):
+    """Carts in a Django cache, written behind to the database."""
+
+    def __init__(self, cache='default', write_behind=5.0, timeout=7 * 24 * 60 * 60, **options):
+        super().__init__(**options)
+        self.cache_alias = cache
+        self.write_behind = write_behind
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._dirty = set()  # customer ids this process changed and has not persisted
+        self._flusher = None
+        # Serialize edits by this process's threads, whatever the cache's add guarantees
+        self._cart_locks = [threading.Lock() for _ in range(64)]
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def _key(self, customer_id):
+        return f"cart:{customer_id}"
+
+    def _load(self, customer_id):
+        """The cart's cache entry, read from the database on a miss."""
+        entry = self.cache.get(self._key(customer_id))
+        if entry is None:
+            cart_id, lines = super().read(customer_id)
+            entry = {
+                "cart": cart_id,
+                "lines": {line.item_id: [line.quantity, line.line_id] for line in lines},
+                "version": 0,
+                "saved": 0,  # version last written to the database
+            }
+            if not self.cache.add(self._key(customer_id), entry, self.timeout):
+                # Another request loaded or edited the cart meanwhile
+                entry = self.cache.get(self._key(customer_id)) or entry
+        return entry
+
+    @contextmanager
+    def _locked(self, customer_id):
+        """Hold the cart's edit lock, shared through the cache with other workers."""
+        key, token = f"cart-lock:{customer_id}", uuid.uuid4().hex
+        with self._cart_locks[customer_id % len(self._cart_locks)]:
+            # A lock left by a crashed worker expires after LOCK_TIMEOUT
+            while not self.cache.add(key, token, LOCK_TIMEOUT):
+                time.sleep(LOCK_POLL)
+            try:
+                yield
+            finally:
+                if self.cache.get(key) == token:
+                    self.cache.delete(key)
+
+    @contextmanager
+    def _editing(self, customer_id):
+        """
+        Yield the cart's cache entry with the edit lock held; the caller
+        ``_store``s it. A miss is read from the database before locking.
+        """
+        self._load(customer_id)
+        with self._locked(customer_id):
+            yield self._load(customer_id)
+
+    def _store(self, customer_id, entry):
+        entry["version"] += 1
+        self.cache.set(self._key(customer_id), entry, self.timeout)
+        with self._lock:
+            self._dirty.add(customer_id)
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name='cart-flusher', daemon=True)
+                self._flusher.start()
+                atexit.register(self.flush_all)
+
+    def read(self, customer_id):
+        entry = self._load(customer_id)
+        return entry["cart"], [CartLine(item_id, quantity, line_id)
+                               for item_id, (quantity, line_id) in entry["lines"].items()]
+
+    def priced(self, customer_id):
+        # The quantities live in the cache, so only the item details come from
+        # the database (one query) and the totals are added up here
+        cart_id, lines = self.read(customer_id)
+        if any(line.line_id is None for line in lines):
+            # Lines not written behind yet have no id for clients to refer to
+            self.flush(customer_id)
+            cart_id, lines = self.read(customer_id)
+        items = {row['id']: row for row in (Item.objects
+                                            .filter(id__in=[line.item_id for line in lines])
+                                            .values('id', 'name', 'price', vendor_name=F('vendor__name')))}
+        priced = []
+        for line in lines:
+            row = items.get(line.item_id)
+            if row is None:
+                continue  # Deleted from the menu since it was added
+            cart_item = CartItem(id=line.line_id, item_id=line.item_id, quantity=line.quantity)
+            cart_item.item_name, cart_item.item_price, cart_item.vendor_name = row['name'], row['price'], row['vendor_name']
+            cart_item.subtotal = row['price'] * line.quantity
+            priced.append(cart_item)
+        return PricedCart(cart_id, priced, sum(line.quantity for line in priced),
+                          sum((line.subtotal for line in priced), Decimal('0')))
+
+    def add(self, customer_id, item_id, quantity):
+        with self._editing(customer_id) as entry:
+            line = entry["lines"].setdefault(item_id, [0, None])
+            line[0] += quantity
+            self._store(customer_id, entry)
+        return line[0]
+
+    def update(self, customer_id, item_id, quantity):
+        with self._editing(customer_id) as entry:
+            entry["lines"][item_id][0] = quantity
+            self._store(customer_id, entry)
+
+    def remove(self, customer_id, item_id):
+        with self._editing(customer_id) as entry:
+            del entry["lines"][item_id]
+            self._store(customer_id, entry)
+
+    def apply(self, customer_id, operations):
+        with self._editing(customer_id) as entry:
+            quantities = apply_operations(
+                {item_id: quantity for item_id, (quantity, _) in entry["lines"].items()}, operations
+            )
+            entry["lines"] = {item_id: [quantity, entry["lines"].get(item_id, [None, None])[1]]
+                              for item_id, quantity in quantities.items()}
+            self._store(customer_id, entry)
+
+    def clear(self, customer_id):
+        with self._editing(customer_id) as entry:
+            removed = len(entry["lines"])
+            if removed:
+                entry["lines"] = {}
+                self._store(customer_id, entry)
+        return removed
+
+    # -- write-behind --------------------------------------------------------
+
+    def _persist(self, customer_id, entry):
+        """
+        Make the database cart match the cache ``entry``; returns the CartItem
+        id of each line. Lines for items deleted from the catalog are dropped.
+
+        Returns None without writing if, once the cart row is locked, the
+        cache no longer holds this version of the entry: checkout drops the
+        entry under the same lock after ordering the lines, and a newer
+        version is written by its own flush.
+        """
+        wanted = {item_id: quantity for item_id, (quantity, _) in entry["lines"].items()}
+        with transaction.atomic():
+            cart, _ = Cart.objects.select_for_update().get_or_create(customer_id=customer_id)
+            current = self.cache.get(self._key(customer_id))
+            if current is None or current["version"] != entry["version"]:
+                return None
+            if wanted:
+                live = set(Item.objects.filter(id__in=wanted).values_list('id', flat=True))
+                wanted = {item_id: quantity for item_id, quantity in wanted.items() if item_id in live}
+            CartItem.objects.filter(cart=cart).exclude(item_id__in=wanted).delete()
+            # Upsert on (cart, item): new lines are inserted, existing ones take the new quantity
+            saved = CartItem.objects.bulk_create(
+                [CartItem(cart=cart, item_id=item_id, quantity=quantity) for item_id, quantity in wanted.items()],
+                update_conflicts=True, unique_fields=['cart', 'item'], update_fields=['quantity'],
+            )
+        return {cart_item.item_id: cart_item.id for cart_item in saved}
+
+    def flush(self, customer_id):
+        """Write the cached cart to the database if it has changes not saved yet."""
+        with self._lock:
+            self._dirty.discard(customer_id)
+
+        entry = self.cache.get(self._key(customer_id))
+        if entry is None or entry["version"] == entry["saved"]:
+            return
+        try:
+            ids = self._persist(customer_id, entry)
+        except Exception:
+            with self._lock:
+                self._dirty.add(customer_id)
+            raise
+
+        # Record the save and the new line ids unless the cart changed meanwhile
+        with self._locked(customer_id):
+            current = self.cache.get(self._key(customer_id))
+            if ids is not None and current is not None and current["version"] == entry["version"]:
+                entry["lines"] = {item_id: [quantity, ids.get(item_id)]
+                                  for item_id, (quantity, _) in entry["lines"].items() if item_id in ids}
+                entry["saved"] = entry["version"]
+                self.cache.set(self._key(customer_id), entry, self.timeout)
+                return
+        if current is not None:
+            with self._lock:
+                self._dirty.add(customer_id)
+
+    def flush_all(self):
+        with self._lock:
+            pending = list(self._dirty)
+        for customer_id in pending:
+            self.flush(customer_id)
+
+    def forget(self, customer_id):
+        with self._lock:
+            self._dirty.discard(customer_id)
+        self.cache.delete(self._key(customer_id))
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.write_behind)
+            try:
+                self.flush_all()
+            except Exception:
+                logger.exception("Writing carts behind failed; retrying in %ss", self.write_behind)
+            finally:
+                connection.close()
+
+
+cart_store = LazyBackend('CART_STORE', 'api.cart_store.DatabaseCartStore')
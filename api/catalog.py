@@ -0,0 +1,338 @@
+"""
+In-memory catalog snapshot used by the customer menus endpoint.
+
+The vendor -> menu -> item -> category tree is built with a fixed number of
+queries and cached per vendor, keyed by ``Vendor.catalog_version``.  Menu
+writes bump the owning vendor's version (see ``touch_vendor``), so a read only
+rebuilds the subtrees of vendors that actually changed - in this process or
+in any other worker sharing the database.
+"""
+import hashlib
+import os
+import threading
+
+from django.conf import settings
+from django.db.models import F, Max
+
+from .models import Vendor, Menu, Item, Category, ItemCategory, CatalogChange
+from .signals import record_catalog_changes
+
+
+def touch_vendor(vendor_id):
+    """Mark a vendor's catalog subtree as changed. Call inside the write transaction."""
+    Vendor.objects.filter(pk=vendor_id).update(catalog_version=F('catalog_version') + 1)
+
+
+def resolve_categories(names):
+    """
+    Return a dict of name -> Category for the given tag names, creating the
+    missing ones. Two queries at most, plus one INSERT for new tags.
+    """
+    names = {name for name in names if name}
+    if not names:
+        return {}
+    categories = {category.name: category for category in Category.objects.filter(name__in=names)}
+    missing = names - categories.keys()
+    if missing:
+        # ignore_conflicts: another request may create the same tag concurrently
+        Category.objects.bulk_create([Category(name=name) for name in sorted(missing)],
+                                     ignore_conflicts=True)
+        categories.update((category.name, category)
+                          for category in Category.objects.filter(name__in=missing))
+    return categories
+
+
+def clean_category_names(values):
+    """Strip a client-supplied category list, dropping blanks and duplicates."""
+    names = []
+    for value in values or []:
+        name = value.strip() if isinstance(value, str) else ''
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def create_menu_items(entries):
+    """
+    Save new menu items and their category links with one INSERT each, plus
+    the category lookups of ``resolve_categories``.
+
+    ``entries`` is a list of ``(unsaved Item, category names)``; the items get
+    their ids in place. ``bulk_create`` sends no signals, so the items are
+    journaled here. Call inside the write transaction, with ``touch_vendor``.
+    """
+    tags = resolve_categories(name for _, names in entries for name in names)
+    items = Item.objects.bulk_create([item for item, _ in entries])
+    ItemCategory.objects.bulk_create([
+        ItemCategory(item=item, category=tags[name]) for item, names in entries for name in names
+    ])
+    record_catalog_changes(items)
+    return items
+
+
+def build_vendor_trees(vendor_ids):
+    """
+    Build the catalog subtree for the given vendors.
+
+    Runs four queries no matter how many vendors, menus or items there are,
+    and returns a dict of vendor id -> vendor data.
+    """
+    vendor_ids = list(vendor_ids)
+    if not vendor_ids:
+        return {}
+
+    categories = {}
+    for item_id, name in (ItemCategory.objects
+                          .filter(item__vendor_id__in=vendor_ids)
+                          .order_by('id')
+                          .values_list('item_id', 'category__name')):
+        categories.setdefault(item_id, []).append(name)
+
+    items = {}
+    for item in (Item.objects
+                 .filter(vendor_id__in=vendor_ids)
+                 .order_by('id')
+                 .values('id', 'menu_id', 'name', 'price', 'description')):
+        items.setdefault(item['menu_id'], []).append({
+            "itemId": item['id'],
+            "itemName": item['name'],
+            "price": float(item['price']),
+            "description": item['description'] or "",
+            "categories": categories.get(item['id'], [])
+        })
+
+    menus = {}
+    for menu in (Menu.objects
+                 .filter(vendor_id__in=vendor_ids)
+                 .order_by('id')
+                 .values('id', 'vendor_id', 'name', 'date')):
+        menus.setdefault(menu['vendor_id'], []).append({
+            "menuId": menu['id'],
+            "menuName": menu['name'],
+            "date": menu['date'],
+            "items": items.get(menu['id'], [])
+        })
+
+    trees = {}
+    for vendor in Vendor.objects.filter(id__in=vendor_ids).values(
+            'id', 'name', 'location', 'working_hours'):
+        trees[vendor['id']] = {
+            "vendorId": vendor['id'],
+            "vendorName": vendor['name'],
+            "location": vendor['location'],
+            "workingHours": vendor['working_hours'],
+            "menus": menus.get(vendor['id'], [])
+        }
+    return trees
+
+
+class CatalogSnapshot:
+    """
+    Versioned, per-vendor cache of the catalog tree.
+
+    Every read checks the vendor versions with one query; only vendors whose
+    version moved since they were cached are rebuilt (four more queries).
+    Cached subtrees are shared between requests and must not be mutated.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._vendors = {}  # vendor id -> (catalog_version, vendor data)
+
+    def versions(self):
+        """Current catalog version of every vendor, ordered by vendor id."""
+        return dict(Vendor.objects.order_by('id').values_list('id', 'catalog_version'))
+
+    def vendors(self, versions=None):
+        """
+        Return the catalog tree as a list of vendor dicts in ``versions`` order.
+
+        ``versions`` (vendor id -> catalog version) may cover just a subset of
+        vendors, e.g. one page; by default every vendor is returned.
+        """
+        prune = versions is None
+        if versions is None:
+            versions = self.versions()
+
+        cached = self._vendors
+        stale = [vendor_id for vendor_id, version in versions.items()
+                 if cached.get(vendor_id, (None,))[0] != version]
+
+        if stale or (prune and len(cached) > len(versions)):
+            trees = build_vendor_trees(stale)
+            with self._lock:
+                if prune:
+                    # Drop vendors that no longer exist
+                    self._vendors = {vendor_id: entry for vendor_id, entry in self._vendors.items()
+                                     if vendor_id in versions}
+                for vendor_id, tree in trees.items():
+                    self._vendors[vendor_id] = (versions[vendor_id], tree)
+            cached = self._vendors
+
+        return [cached[vendor_id][1] for vendor_id in versions if vendor_id in cached]
+
+    def clear(self):
+        """Drop every cached subtree."""
+        with self._lock:
+            self._vendors = {}
+
+
+catalog = CatalogSnapshot()
+
+
+def catalog_etag(versions, *parts):
+    """
+    Strong ETag for a catalog response.
+
+    Derived from the catalog versions of the vendors involved plus anything
+    else that shapes the response (filters, cursor, page size), so it can be
+    checked before the payload is built.
+    """
+    digest = hashlib.sha1()
+    digest.update(repr(sorted(versions.items())).encode('utf-8'))
+    digest.update(repr(parts).encode('utf-8'))
+    return f'"{digest.hexdigest()}"'
+
+
+def filter_vendor_tree(tree, menu_ids=None, min_price=None, max_price=None, item_ids=None):
+    """
+    Return a filtered copy of a vendor subtree, or None if nothing matches.
+
+    ``item_ids`` (a set, e.g. from the tag index) keeps only those items.
+
+    The cached tree itself is never modified.
+    """
+    menus = []
+    for menu in tree["menus"]:
+        if menu_ids is not None and menu["menuId"] not in menu_ids:
+            continue
+        items = [
+            item for item in menu["items"]
+            if (min_price is None or item["price"] >= min_price)
+            and (max_price is None or item["price"] <= max_price)
+            and (item_ids is None or item["itemId"] in item_ids)
+        ]
+        if items:
+            menus.append({**menu, "items": items})
+    if not menus:
+        return None
+    return {**tree, "menus": menus}
+
+
+def get_catalog_file():
+    """The shared compiled catalog file, or None when ``CATALOG_FILE`` is unset."""
+    global _catalog_file
+    path = getattr(settings, 'CATALOG_FILE', None)
+    if not path:
+        return None
+    if _catalog_file is None or _catalog_file.path != os.fspath(path):
+        from .catalog_file import CatalogFile
+        _catalog_file = CatalogFile(path)
+    return _catalog_file
+
+
+_catalog_file = None
+
+
+class CatalogHistoryExpired(Exception):
+    """The change journal no longer reaches back to the requested version."""
+
+
+def current_catalog_version():
+    """Id of the newest change journal entry, 0 if nothing was recorded yet."""
+    return CatalogChange.objects.aggregate(version=Max('id'))['version'] or 0
+
+
+def changes_since(version):
+    """
+    Collapse the journal entries after ``version`` into ``{(kind, object_id):
+    deleted}``, the last entry for an object deciding. Returns the newest
+    version read and that dict; one query, usually empty. Used by the
+    in-memory indexes to catch up with writes from any worker.
+    """
+    latest = {}
+    for version, kind, object_id, deleted in (CatalogChange.objects
+                                              .filter(id__gt=version)
+                                              .order_by('id')
+                                              .values_list('id', 'kind', 'object_id', 'deleted')):
+        latest[(kind, object_id)] = deleted
+    return version, latest
+
+
+# How each kind of journal entry is turned into a response row
+CHANGE_KINDS = {
+    'vendor': (Vendor, {
+        'vendorId': 'id', 'vendorName': 'name', 'location': 'location',
+        'workingHours': 'working_hours',
+    }),
+    'menu': (Menu, {
+        'menuId': 'id', 'vendorId': 'vendor_id', 'menuName': 'name', 'date': 'date',
+    }),
+    'item': (Item, {
+        'itemId': 'id', 'menuId': 'menu_id', 'vendorId': 'vendor_id', 'itemName': 'name',
+        'price': 'price', 'description': 'description',
+    }),
+    'category': (Category, {
+        'categoryId': 'id', 'name': 'name',
+    }),
+}
+CHANGE_GROUPS = {'vendor': 'vendors', 'menu': 'menus', 'item': 'items', 'category': 'categories'}
+
+
+def catalog_changes(since, limit=1000):
+    """
+    Collapse the journal entries after version ``since`` into upserts and
+    tombstones per kind, reading at most ``limit`` entries.
+
+    Upserted rows carry their current values (items include their category
+    names), so applying a page twice is harmless. Costs one journal query
+    plus one query per kind that changed.
+    """
+    oldest = CatalogChange.objects.order_by('id').values_list('id', flat=True).first()
+    if oldest is not None and since < oldest - 1:
+        raise CatalogHistoryExpired(since)
+
+    entries = list(CatalogChange.objects
+                   .filter(id__gt=since)
+                   .order_by('id')
+                   .values_list('id', 'kind', 'object_id', 'deleted')[:limit + 1])
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # The last entry for an object decides whether it is an upsert or a tombstone
+    latest = {}
+    for _, kind, object_id, deleted in entries:
+        latest[(kind, object_id)] = deleted
+
+    data = {
+        "since": since,
+        "version": entries[-1][0] if entries else since,
+        "hasMore": has_more,
+    }
+    for kind, (model, fields) in CHANGE_KINDS.items():
+        upserts = [object_id for (k, object_id), deleted in latest.items() if k == kind and not deleted]
+        deletes = [object_id for (k, object_id), deleted in latest.items() if k == kind and deleted]
+
+        rows = []
+        if upserts:
+            found = set()
+            for row in model.objects.filter(id__in=upserts).order_by('id').values(*fields.values()):
+                found.add(row['id'])
+                rows.append({key: row[column] for key, column in fields.items()})
+            # Rows deleted after the journal was read are tombstones too
+            deletes += [object_id for object_id in upserts if object_id not in found]
+
+        if kind == 'item' and rows:
+            categories = {}
+            for item_id, name in (ItemCategory.objects
+                                  .filter(item_id__in=[row['itemId'] for row in rows])
+                                  .order_by('id')
+                                  .values_list('item_id', 'category__name')):
+                categories.setdefault(item_id, []).append(name)
+            for row in rows:
+                row['price'] = float(row['price'])
+                row['description'] = row['description'] or ""
+                row['categories'] = categories.get(row['itemId'], [])
+
+        data[CHANGE_GROUPS[kind]] = {"upserted": rows, "deleted": sorted(deletes)}
+    return data
@@ -0,0 +1,162 @@
+"""
+Compiled, memory-mapped catalog shared by every worker process.
+
+The file holds the customer catalog as pre-serialized JSON, one segment per
+vendor, behind a small offset index::
+
+    MAGIC | index length (8 bytes, big endian) | index JSON | [seg,seg,...]
+
+The body is itself a valid JSON array, so the full catalog is a single slice
+of the mapping.  Each index entry is ``[vendor_id, catalog_version, offset,
+length]``.  When any vendor's ``catalog_version`` moves, the first reader to
+notice rebuilds the stale segments (reusing the others byte for byte), writes
+a new file next to the old one and atomically swaps it in with
+``os.replace``.  Other workers pick the new file up on their next read.
+"""
+import json
+import mmap
+import os
+import threading
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from .catalog import build_vendor_trees
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to the in-process lock only
+    fcntl = None
+
+MAGIC = b'MRCATv1\n'
+HEADER_SIZE = len(MAGIC) + 8
+
+
+def encode_segment(tree):
+    """Serialize one vendor subtree exactly the way DRF's JSONRenderer would."""
+    return json.dumps(tree, cls=JSONEncoder, ensure_ascii=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+class CatalogFile:
+    """Reader/rebuilder for a compiled catalog file at ``path``."""
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        self._lock = threading.Lock()
+        self._stat = None
+        self._map = None
+        self._index = {}  # vendor id -> (catalog_version, offset, length)
+        self._order = []  # vendor ids in file order
+        self._body = (0, 0)  # offset and length of the whole JSON array
+
+    def _load(self):
+        """(Re)map the file if it was swapped since we last looked."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self._stat, self._map, self._index, self._order = None, None, {}, []
+            return
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if key == self._stat:
+            return
+
+        with open(self.path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapped[:len(MAGIC)] != MAGIC:
+            mapped.close()
+            raise ValueError(f"{self.path} is not a compiled catalog file")
+        index_len = int.from_bytes(mapped[len(MAGIC):HEADER_SIZE], 'big')
+        index = json.loads(mapped[HEADER_SIZE:HEADER_SIZE + index_len])
+
+        # Older mappings stay valid for readers still holding slices of them;
+        # they are released once garbage collected.
+        self._map = mapped
+        self._index = {vendor_id: (version, offset, length)
+                       for vendor_id, version, offset, length in index['vendors']}
+        self._order = [entry[0] for entry in index['vendors']]
+        self._body = tuple(index['body'])
+        self._stat = key
+
+    def _is_current(self, versions):
+        return (self._map is not None
+                and self._order == list(versions)
+                and all(self._index[vendor_id][0] == version
+                        for vendor_id, version in versions.items()))
+
+    def _segment(self, vendor_id):
+        _, offset, length = self._index[vendor_id]
+        return self._map[offset:offset + length]
+
+    def rebuild(self, versions):
+        """Write a new file matching ``versions`` and swap it in atomically."""
+        lock_path = self.path + '.lock'
+        with open(lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                # Another worker may have rebuilt while we waited for the lock
+                self._load()
+                if self._is_current(versions):
+                    return
+
+                stale = [vendor_id for vendor_id, version in versions.items()
+                         if self._index.get(vendor_id, (None,))[0] != version]
+                trees = build_vendor_trees(stale)
+                segments = []
+                for vendor_id, version in versions.items():
+                    if vendor_id in trees:
+                        segments.append((vendor_id, version, encode_segment(trees[vendor_id])))
+                    elif vendor_id not in stale:
+                        segments.append((vendor_id, version, self._segment(vendor_id)))
+                self._write(segments)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write(self, segments):
+        # Lay out the body first so the index can carry absolute offsets; the
+        # index length only depends on the digits, so iterate until it is stable.
+        index_len = 0
+        while True:
+            offset = HEADER_SIZE + index_len + 1  # skip the opening '['
+            entries = []
+            for vendor_id, version, data in segments:
+                entries.append([vendor_id, version, offset, len(data)])
+                offset += len(data) + 1  # segment plus its ',' (or the closing ']')
+            body_start = HEADER_SIZE + index_len
+            body_len = max(offset - body_start, 2)
+            index = json.dumps({'vendors': entries, 'body': [body_start, body_len]},
+                               separators=(',', ':')).encode('utf-8')
+            if len(index) == index_len:
+                break
+            index_len = len(index)
+
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(index_len.to_bytes(8, 'big'))
+            f.write(index)
+            f.write(b'[')
+            f.write(b','.join(data for _, _, data in segments))
+            f.write(b']')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._load()
+
+    def render(self, versions, vendor_ids=None):
+        """
+        Return the catalog JSON for ``versions`` (vendor id -> catalog version,
+        ordered by vendor id), rebuilding the file first if it is out of date.
+
+        With ``vendor_ids`` only those vendors are included.
+        """
+        with self._lock:
+            self._load()
+            if not self._is_current(versions):
+                self.rebuild(versions)
+
+            if vendor_ids is None:
+                offset, length = self._body
+                return self._map[offset:offset + length]
+            return b'[' + b','.join(self._segment(vendor_id) for vendor_id in vendor_ids) + b']'
@@ -0,0 +1,77 @@
+"""
+DB-backed queue for asynchronous checkout.
+
+``CheckoutView`` in async mode only checks that the cart has lines, queues a
+``CheckoutJob`` and answers ``202``; the ``process_checkouts`` command drains
+the queue with a pool of threads or processes. Each pool task takes a batch of
+queued jobs and runs them in one transaction (one savepoint per job, so a
+failed checkout does not undo the others), so claiming a job and placing its
+order commit together: a worker that dies mid-batch leaves its jobs queued.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .cart_store import cart_store
+from .models import Cart, CheckoutJob
+from .orders import EmptyCartError, place_order
+
+
+def enqueue_checkout(customer, payment_method='Cash', comment=''):
+    """
+    Queue a checkout of ``customer``'s cart, or return the job already
+    waiting for it (the worker checks out the whole cart either way).
+    """
+    job = CheckoutJob.objects.filter(customer=customer, status='queued').order_by('id').first()
+    if job is None:
+        job = CheckoutJob.objects.create(customer=customer, payment_method=payment_method, comment=comment)
+    return job
+
+
+def process_batch(batch_size=50):
+    """Run up to ``batch_size`` queued jobs in one transaction; returns how many ran."""
+    with transaction.atomic():
+        jobs = list(CheckoutJob.objects
+                    .select_for_update(skip_locked=True)
+                    .filter(status='queued')
+                    .select_related('customer')
+                    .order_by('id')[:batch_size])
+        if not jobs:
+            return 0
+
+        for job in jobs:
+            try:
+                cart_store.flush(job.customer_id)
+                job.order, _ = place_order(job.customer, job.payment_method, job.comment)
+                job.status = 'done'
+                # The cached copy of the cart is stale once the order commits
+                transaction.on_commit(lambda customer_id=job.customer_id: cart_store.forget(customer_id))
+            except (Cart.DoesNotExist, EmptyCartError):
+                job.status, job.error = 'failed', 'Cart is empty. Cannot checkout.'
+            except Exception as e:
+                job.status, job.error = 'failed', str(e)
+            job.finished = timezone.now()
+
+        CheckoutJob.objects.bulk_update(jobs, ['status', 'order', 'error', 'finished'])
+    return len(jobs)
+
+
+def job_status(job):
+    """Response body for the job's status endpoint."""
+    data = {
+        'job_id': job.id,
+        'status': job.status,
+        'created': job.created,
+        'finished': job.finished,
+    }
+    if job.order is not None:
+        data['order'] = {
+            'order_id': job.order.id,
+            'order_date': job.order.date,
+            'total_amount': float(job.order.total_amount),
+            'status': job.order.status,
+            'payment_method': job.order.payment_method,
+            'comment': job.order.comment,
+        }
+    if job.error:
+        data['error'] = job.error
+    return data
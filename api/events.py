@@ -0,0 +1,178 @@
+"""
+Small pub/sub broker for pushing order events to connected clients.
+
+Publishers (sync code, e.g. ``CheckoutView`` after commit) call
+``broker.publish(channel, event)``; the SSE view subscribes with
+``broker.subscribe(channel)`` and iterates asynchronously.
+
+The backend is chosen by ``settings.EVENT_BROKER``:
+
+``api.events.InProcessBackend`` (default)
+    Delivers to subscribers in the same process only. Fine for a single
+    ASGI worker.
+
+``api.events.SQLiteBackend``
+    Local stand-in for a shared broker such as Redis: events are appended
+    to a small SQLite file (``OPTIONS['path']``) that every process tails,
+    so a checkout handled by one worker reaches streams held by another.
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from .backends import LazyBackend
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """Async iterator over the events published to one channel."""
+
+    def __init__(self, backend, channel, max_queue=100):
+        self.backend = backend
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=max_queue)
+
+    def deliver(self, event):
+        # Called from any thread; hop onto the subscriber's event loop
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        if self.queue.full():
+            # A slow client loses its oldest events rather than stalling publishers
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        """Next event, or None if nothing arrived within ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.backend.unsubscribe(self)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.queue.get()
+
+
+class InProcessBackend:
+    """Fan out events to the subscribers of this process."""
+
+    # Whether events published here reach subscribers in other processes
+    shared = False
+
+    def __init__(self, **options):
+        self._lock = threading.Lock()
+        self._subscribers = {}  # channel -> set of Subscription
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def deliver(self, channel, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    def publish(self, channel, event):
+        self.deliver(channel, event)
+
+
+class SQLiteBackend(InProcessBackend):
+    """
+    Share events between processes through an append-only SQLite file.
+
+    Each process starts one daemon thread that polls for rows newer than the
+    last one it saw and hands them to its local subscribers. Rows older than
+    ``retention`` seconds are trimmed by publishers. A failed poll (e.g.
+    "database is locked") is logged and retried with a doubling delay of up
+    to ``MAX_RETRY_DELAY`` seconds.
+    """
+
+    MAX_RETRY_DELAY = 30
+
+    shared = True
+
+    def __init__(self, path, poll_interval=0.25, retention=300, **options):
+        super().__init__(**options)
+        self.path = str(path)
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._local = threading.local()
+        self._poller = None
+
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, "
+                "payload TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._last_id = db.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+
+    def _connect(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+        return db
+
+    def publish(self, channel, event):
+        now = time.time()
+        db = self._connect()
+        db.execute("INSERT INTO events (channel, payload, created) VALUES (?, ?, ?)",
+                   (channel, json.dumps(event), now))
+        db.execute("DELETE FROM events WHERE created < ?", (now - self.retention,))
+
+    def subscribe(self, channel):
+        with self._lock:
+            if self._poller is None:
+                self._poller = threading.Thread(target=self._poll, name='event-poller', daemon=True)
+                self._poller.start()
+        return super().subscribe(channel)
+
+    def _poll(self):
+        delay = self.poll_interval
+        while True:
+            try:
+                rows = self._connect().execute(
+                    "SELECT id, channel, payload FROM events WHERE id > ? ORDER BY id", (self._last_id,)
+                ).fetchall()
+                for event_id, channel, payload in rows:
+                    self._last_id = event_id
+                    self.deliver(channel, json.loads(payload))
+            except Exception:
+                # Keep the streams of this process alive through transient errors
+                delay = min(delay * 2, self.MAX_RETRY_DELAY)
+                logger.exception("Polling %s for events failed; retrying in %ss", self.path, delay)
+                time.sleep(delay)
+                continue
+            delay = self.poll_interval
+            time.sleep(self.poll_interval)
+
+
+broker = LazyBackend('EVENT_BROKER', 'api.events.InProcessBackend')
+
+
+def vendor_channel(vendor_id):
+    return f"vendor.{vendor_id}"
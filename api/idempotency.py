@@ -0,0 +1,115 @@
+"""
+``Idempotency-Key`` support for write endpoints that clients retry.
+
+The first request with a given key (per user) claims a row in
+``IdempotencyKey``, runs the view and stores its response; a retry with the
+same key gets that response back (status, body and the headers the view
+set, such as ``Location`` and ``Server-Timing``) from one indexed lookup,
+without running the view again. A retry that arrives while the first request is still
+running gets ``409``, and reusing a key for a different request body gets
+``422``. Server errors are not stored, so the client may retry them.
+
+Keys expire after ``settings.IDEMPOTENCY_KEY_TTL`` seconds; the
+``prune_idempotency_keys`` command deletes the expired rows.
+"""
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+# A claim left unfinished this long belongs to a request that died; let a retry take it over
+PENDING_TIMEOUT = timedelta(seconds=60)
+# Set again by the renderer when the replayed response is rendered
+UNSTORED_HEADERS = {'content-type'}
+
+
+def key_ttl():
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+
+
+def _fingerprint(request):
+    payload = json.dumps([request.method, request.path, request.data], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _claim(user, key, fingerprint):
+    """Return the live row already stored for the key, or create (claim) it."""
+    now = timezone.now()
+    for _ in range(2):
+        existing = IdempotencyKey.objects.filter(user=user, key=key).first()
+        if existing is not None:
+            expired = existing.created < now - key_ttl()
+            abandoned = existing.status_code is None and existing.created < now - PENDING_TIMEOUT
+            if not (expired or abandoned):
+                return existing, False
+            existing.delete()
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(user=user, key=key, fingerprint=fingerprint), True
+        except IntegrityError:
+            # A concurrent request claimed it between the lookup and the insert
+            continue
+    raise IntegrityError(f"Could not claim idempotency key {key!r}")
+
+
+def _replay(record, fingerprint):
+    if record.fingerprint != fingerprint:
+        return Response(
+            {"error": f"{HEADER} was already used for a different request"},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    if record.status_code is None:
+        return Response(
+            {"error": f"A request with this {HEADER} is still being processed"},
+            status=status.HTTP_409_CONFLICT
+        )
+    response = Response(json.loads(record.body) if record.body else None, status=record.status_code,
+                        headers=record.headers)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(view_method):
+    """Decorate an ``APIView`` handler to honour the ``Idempotency-Key`` header."""
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key or not request.user.is_authenticated:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response({"error": f"{HEADER} must be at most 255 characters"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        fingerprint = _fingerprint(request)
+        record, claimed = _claim(request.user, key, fingerprint)
+        if not claimed:
+            return _replay(record, fingerprint)
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+
+        if response.status_code >= 500:
+            # Nothing was committed that a retry could duplicate; let it run again
+            record.delete()
+            return response
+
+        record.status_code = response.status_code
+        record.body = json.dumps(response.data, cls=JSONEncoder) if response.data is not None else ''
+        record.headers = {name: value for name, value in response.items()
+                          if name.lower() not in UNSTORED_HEADERS}
+        record.save(update_fields=['status_code', 'body', 'headers'])
+        return response
+    return wrapper
@@ -0,0 +1,135 @@
+"""
+Per-item daily stock limits on sharded counters.
+
+An item with ``daily_stock_limit`` gets ``STOCK_COUNTER_SHARDS`` counter rows
+per day, shard ``i`` allowed its slice of the limit. A reservation adds to a
+random shard with one conditional ``UPDATE`` (``reserved + qty <= slice``),
+so concurrent checkouts of a popular item spread their row locks over N
+rows instead of queueing on one. Only when that shard is full does it fall
+back to reading every shard and spilling across the ones with room. The
+units left are the limit minus the sum of the shards.
+
+Which shard each order drew from is kept in ``StockReservation`` so that
+cancelling gives the units back to the same rows.
+
+Sharding pays off only where the database locks rows. SQLite (with
+``transaction_mode`` IMMEDIATE) runs one write transaction at a time, so
+every shard count gives the same checkout throughput there; the settings
+use a single shard. ``manage.py benchmark_stock`` compares the two through
+the checkout endpoint.
+"""
+import random
+
+from django.conf import settings
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import StockCounter, StockReservation
+
+
+class OutOfStockError(Exception):
+    """Raised with the items whose daily limit a checkout would exceed."""
+
+    def __init__(self, items):
+        self.items = items
+        super().__init__("Not enough stock left today for: " + ", ".join(item.name for item in items))
+
+
+def shard_count():
+    return getattr(settings, 'STOCK_COUNTER_SHARDS', 8)
+
+
+def shard_capacity(limit, shards, shard):
+    """Shard ``shard``'s slice of ``limit``; the remainder goes to the first shards."""
+    return limit // shards + (1 if shard < limit % shards else 0)
+
+
+def _take(item, day, shard, quantity, shards):
+    """Add ``quantity`` to one shard if it stays within its slice; True on success."""
+    capacity = shard_capacity(item.daily_stock_limit, shards, shard)
+    if quantity > capacity:
+        return False
+    return StockCounter.objects.filter(
+        item=item, day=day, shard=shard, reserved__lte=capacity - quantity
+    ).update(reserved=F('reserved') + quantity) == 1
+
+
+def _reserve_item(item, quantity, day, shards):
+    """Reserve ``quantity`` of one item; returns ``[(shard, units)]`` or None if sold out."""
+    order = random.sample(range(shards), shards)
+
+    # Fast path: the whole quantity from one random shard
+    if _take(item, day, order[0], quantity, shards):
+        return [(order[0], quantity)]
+    if not StockCounter.objects.filter(item=item, day=day).exists():
+        # First reservation of the day: create the shards, then retry
+        StockCounter.objects.bulk_create(
+            [StockCounter(item=item, day=day, shard=shard) for shard in range(shards)],
+            ignore_conflicts=True,
+        )
+        if _take(item, day, order[0], quantity, shards):
+            return [(order[0], quantity)]
+
+    # That shard is full: spill over the shards that still have room
+    reserved = dict(StockCounter.objects.filter(item=item, day=day).values_list('shard', 'reserved'))
+    taken, needed = [], quantity
+    for shard in order:
+        room = shard_capacity(item.daily_stock_limit, shards, shard) - reserved.get(shard, 0)
+        units = min(room, needed)
+        if units > 0 and _take(item, day, shard, units, shards):
+            taken.append((shard, units))
+            needed -= units
+        if not needed:
+            return taken
+    return None
+
+
+def reserve_stock(order, lines):
+    """
+    Reserve today's stock for the ``(item, quantity)`` lines of ``order``.
+
+    Must run inside the checkout transaction: on ``OutOfStockError`` the
+    caller rolls back, which also undoes any shards already taken. Items
+    without a limit cost no queries.
+    """
+    shards = shard_count()
+    day = timezone.localdate()
+    reservations, sold_out = [], []
+    for item, quantity in lines:
+        if item.daily_stock_limit is None:
+            continue
+        taken = _reserve_item(item, quantity, day, shards)
+        if taken is None:
+            sold_out.append(item)
+            continue
+        reservations.extend(
+            StockReservation(order=order, item=item, day=day, shard=shard, quantity=units)
+            for shard, units in taken
+        )
+    if sold_out:
+        raise OutOfStockError(sold_out)
+    StockReservation.objects.bulk_create(reservations)
+
+
+def release_stock(order):
+    """Give back everything ``order`` reserved (call inside the cancel transaction)."""
+    reservations = list(StockReservation.objects.filter(order=order))
+    for reservation in reservations:
+        StockCounter.objects.filter(
+            item_id=reservation.item_id, day=reservation.day, shard=reservation.shard
+        ).update(reserved=F('reserved') - reservation.quantity)
+    StockReservation.objects.filter(order=order).delete()
+    return len(reservations)
+
+
+def stock_levels(items, day=None):
+    """``{item_id: units left today}`` for items with a limit, summing the shards in one query."""
+    limited = {item.id: item.daily_stock_limit for item in items if item.daily_stock_limit is not None}
+    if not limited:
+        return {}
+    reserved = dict(StockCounter.objects
+                    .filter(item_id__in=limited, day=day or timezone.localdate())
+                    .values('item_id')
+                    .annotate(total=Sum('reserved'))
+                    .values_list('item_id', 'total'))
+    return {item_id: max(limit - reserved.get(item_id, 0), 0) for item_id, limit in limited.items()}
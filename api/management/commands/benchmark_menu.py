@@ -0,0 +1,77 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.models import Category, Vendor
+
+TAG_PREFIX = 'menu-benchmark-'
+
+
+class Command(BaseCommand):
+    help = ("Time creating a menu of N items through POST /api/vendor/menus/ and adding N items "
+            "to it through PUT, counting queries. Uses a scratch vendor that is deleted afterwards.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', default='10,100,500,2000',
+                            help="Comma-separated menu sizes")
+        parser.add_argument('--categories', type=int, default=3,
+                            help="Category tags per item, drawn from a pool of 20")
+        parser.add_argument('--repeat', type=int, default=3,
+                            help="Runs per size; the fastest is reported")
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['items'].split(',')]
+        user = User.objects.create_user('menu-benchmark', 'menu-benchmark@example.com')
+        Vendor.objects.create(user=user, name='Menu benchmark')
+        client = APIClient()
+        client.force_authenticate(user)
+
+        try:
+            self.stdout.write(f"{'items':>6} {'POST ms':>9} {'queries':>8} {'PUT ms':>9} {'queries':>8}")
+            for size in sizes:
+                post = put = (float('inf'), 0)
+                for _ in range(options['repeat']):
+                    items = self.items(size, options['categories'])
+                    elapsed, queries, response = self.request(
+                        client.post, reverse('vendor-menus'), {'menu_name': 'Benchmark', 'items': items})
+                    if response.status_code != 201:
+                        raise CommandError(f"POST failed ({response.status_code}): {response.data}")
+                    post = min(post, (elapsed, queries))
+
+                    menu_id = response.data['menu']['menuId']
+                    elapsed, queries, response = self.request(
+                        client.put, reverse('vendor-menu-detail', args=[menu_id]), {'new_items': items})
+                    if response.status_code != 200:
+                        raise CommandError(f"PUT failed ({response.status_code}): {response.data}")
+                    put = min(put, (elapsed, queries))
+
+                self.stdout.write(f"{size:>6} {post[0] * 1000:>9.1f} {post[1]:>8} "
+                                  f"{put[0] * 1000:>9.1f} {put[1]:>8}")
+        finally:
+            user.delete()
+            Category.objects.filter(name__startswith=TAG_PREFIX).delete()
+
+        self.stdout.write(self.style.SUCCESS("Done"))
+
+    def items(self, size, categories):
+        return [
+            {
+                'name': f'Item {i}',
+                'price': f'{i % 50 + 1}.50',
+                'description': f'Benchmark item {i}',
+                'categories': [f'{TAG_PREFIX}{(i + c) % 20}' for c in range(categories)],
+            }
+            for i in range(size)
+        ]
+
+    def request(self, method, url, data):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = method(url, data, format='json')
+            elapsed = time.perf_counter() - started
+        return elapsed, len(queries), response
@@ -0,0 +1,100 @@
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.inventory import shard_count
+from api.models import Cart, CartItem, Customer, Item, Menu, StockCounter, Vendor
+
+USER_PREFIX = 'stock-benchmark-'
+
+
+class Command(BaseCommand):
+    help = ("Measure checkouts per second through POST /api/cart/checkout/ when every order takes "
+            "one hot item with a daily stock limit, as concurrent checkouts rise, with a single "
+            "counter row and with sharded counters. Uses scratch customers and a scratch vendor "
+            "that are deleted afterwards.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', default='1,2,4,8,16',
+                            help="Comma-separated concurrency levels")
+        parser.add_argument('--checkouts', type=int, default=50,
+                            help="Checkouts per thread, each by its own customer")
+        parser.add_argument('--shards', type=int, default=max(shard_count(), 8),
+                            help="Sharded configuration compared against a single counter row")
+
+    def handle(self, *args, **options):
+        levels = [int(level) for level in options['threads'].split(',')]
+        per_thread = options['checkouts']
+
+        vendor = Vendor.objects.create(name='Stock benchmark')
+        menu = Menu.objects.create(vendor=vendor, name='Stock benchmark')
+        item = Item.objects.create(vendor=vendor, menu=menu, name='Hot item', price=1,
+                                   daily_stock_limit=10 ** 9)
+        try:
+            self.stdout.write(f"{'threads':>8} {'shards':>7} {'checkouts/s':>12}")
+            for shards in sorted({1, options['shards']}):
+                for threads in levels:
+                    with override_settings(STOCK_COUNTER_SHARDS=shards):
+                        rate = self.run(item, threads, per_thread)
+                    self.stdout.write(f"{threads:>8} {shards:>7} {rate:>12.0f}")
+        finally:
+            vendor.delete()
+            User.objects.filter(username__startswith=USER_PREFIX).delete()
+
+        if connection.vendor == 'sqlite':
+            self.stdout.write("SQLite serializes every write transaction, so shards cannot help here; "
+                              "compare them on a row-locking database.")
+        self.stdout.write(self.style.SUCCESS("Done"))
+
+    def customers(self, item, count):
+        """``count`` scratch customers, each with the hot item in the cart."""
+        User.objects.filter(username__startswith=USER_PREFIX).delete()
+        # Re-read after each bulk insert: not every backend returns the new ids
+        User.objects.bulk_create([User(username=f'{USER_PREFIX}{i}') for i in range(count)])
+        users = list(User.objects.filter(username__startswith=USER_PREFIX).order_by('id'))
+        Customer.objects.bulk_create([
+            Customer(user=user, name=user.username, email=f'{user.username}@example.com') for user in users
+        ])
+        Cart.objects.bulk_create([Cart(customer=customer) for customer in Customer.objects.filter(user__in=users)])
+        CartItem.objects.bulk_create([CartItem(cart=cart, item=item, quantity=1)
+                                      for cart in Cart.objects.filter(customer__user__in=users)])
+        return users
+
+    def run(self, item, threads, per_thread):
+        StockCounter.objects.filter(item=item).delete()
+        users = self.customers(item, threads * per_thread)
+        start = threading.Barrier(threads + 1)
+        errors = []
+
+        def work(users):
+            client = APIClient()
+            start.wait()
+            try:
+                for user in users:
+                    client.force_authenticate(user)
+                    response = client.post(reverse('checkout') + '?async=false', {}, format='json')
+                    if response.status_code != 201:
+                        raise CommandError(f"Checkout failed ({response.status_code}): {response.data}")
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=work, args=(users[i::threads],)) for i in range(threads)]
+        for worker in workers:
+            worker.start()
+        start.wait()
+        began = time.perf_counter()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - began
+
+        if errors:
+            self.stderr.write(f"{len(errors)} thread(s) failed: {errors[0]}")
+        return threads * per_thread / elapsed
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.catalog import catalog, get_catalog_file
+
+
+class Command(BaseCommand):
+    help = "Compile the customer catalog file configured by CATALOG_FILE (run on deploy or from cron)"
+
+    def handle(self, *args, **options):
+        catalog_file = get_catalog_file()
+        if catalog_file is None:
+            raise CommandError("CATALOG_FILE is not set in settings")
+
+        versions = catalog.versions()
+        catalog_file.rebuild(versions)
+        self.stdout.write(self.style.SUCCESS(
+            f"Catalog with {len(versions)} vendors written to {settings.CATALOG_FILE}"
+        ))
@@ -0,0 +1,41 @@
+import contextlib
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.menu_io import export_menu_rows, render_rows
+from api.models import Vendor
+from api.records import FORMATS, guess_format
+
+
+class Command(BaseCommand):
+    help = ("Write a vendor's menus, items and categories as CSV or NDJSON, one row per item "
+            "(see api/menu_io.py), reading the items page by page")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vendor', type=int, required=True, help="Vendor id")
+        parser.add_argument('--output', default='-', help="File to write, or - for standard output")
+        parser.add_argument('--format', choices=FORMATS,
+                            help="Default: from the output file extension, else ndjson")
+
+    def handle(self, *args, **options):
+        path = options['output']
+        fmt = options['format'] or guess_format(path) or 'ndjson'
+        try:
+            vendor = Vendor.objects.get(pk=options['vendor'])
+        except Vendor.DoesNotExist:
+            raise CommandError(f"Vendor {options['vendor']} does not exist")
+
+        if path == '-':
+            output = contextlib.nullcontext(sys.stdout)
+        else:
+            output = open(path, 'w', newline='', encoding='utf-8')
+
+        rows = 0
+        with output as out:
+            for line in render_rows(export_menu_rows(vendor), fmt):
+                out.write(line)
+                rows += 1
+
+        if path != '-':
+            self.stdout.write(self.style.SUCCESS(f"Wrote {rows} lines to {path}"))
@@ -0,0 +1,53 @@
+import contextlib
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.menu_io import import_menu_rows
+from api.models import Vendor
+from api.records import FORMATS, guess_format, read_records
+
+
+class Command(BaseCommand):
+    help = ("Create menus for a vendor from a CSV or NDJSON file with one row per item "
+            "(see api/menu_io.py), committing every --chunk-size rows")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or - for standard input")
+        parser.add_argument('--vendor', type=int, required=True, help="Vendor id")
+        parser.add_argument('--format', choices=FORMATS, help="Default: from the file extension")
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help="Rows committed per transaction")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+        if fmt is None:
+            raise CommandError("Cannot tell the format from the file name; pass --format")
+        try:
+            vendor = Vendor.objects.get(pk=options['vendor'])
+        except Vendor.DoesNotExist:
+            raise CommandError(f"Vendor {options['vendor']} does not exist")
+
+        if path == '-':
+            stream = contextlib.nullcontext(sys.stdin)
+        else:
+            stream = open(path, newline='', encoding='utf-8-sig')
+
+        started = time.perf_counter()
+
+        def progress(result):
+            rate = result.items / (time.perf_counter() - started)
+            self.stdout.write(f"Imported {result.items} items, skipped {result.skipped} rows ({rate:.0f}/s)")
+
+        with stream as lines:
+            result = import_menu_rows(vendor, read_records(lines, fmt), options['chunk_size'], progress)
+
+        for error in result.errors:
+            self.stderr.write(f"line {error['line']}: {error['error']}, skipped")
+        if result.error:
+            raise CommandError(f"{path}: {result.error} ({result.items} items were imported before it)")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.items} items into {len(result.menus)} menus, skipped {result.skipped} rows"
+        ))
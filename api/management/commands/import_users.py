@@ -0,0 +1,171 @@
+import contextlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connections, transaction
+
+from api.models import Customer, Vendor
+from api.records import FORMATS, RecordError, chunked, guess_format, read_records
+from api.signals import record_catalog_changes
+from api.workers import init_worker_process
+
+# Profile model and the record fields copied onto it, per role
+ROLES = {
+    'customer': (Customer, ['name', 'phone', 'email', 'address', 'department_number',
+                            'building_number', 'street_number', 'city']),
+    'vendor': (Vendor, ['name', 'location', 'working_hours']),
+}
+
+
+class Command(BaseCommand):
+    help = ("Create customer or vendor accounts from a CSV or NDJSON file with username, email "
+            "and password fields plus the profile fields. Passwords are hashed in a process pool "
+            "while the previous chunk is inserted; usernames that already exist are skipped.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or - for standard input")
+        parser.add_argument('--role', choices=sorted(ROLES), required=True)
+        parser.add_argument('--format', choices=FORMATS, help="Default: from the file extension")
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help="Accounts inserted per transaction")
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help="Processes hashing passwords")
+
+    def handle(self, *args, **options):
+        path, role = options['path'], options['role']
+        fmt = options['format'] or guess_format(path)
+        if fmt is None:
+            raise CommandError("Cannot tell the format from the file name; pass --format")
+        self.model, self.fields = ROLES[role]
+        self.created = self.skipped = 0
+        self.seen = set()
+        # Customer emails of earlier chunks, which may not be inserted yet
+        self.seen_emails = set()
+
+        if path == '-':
+            stream = contextlib.nullcontext(sys.stdin)
+        else:
+            stream = open(path, newline='', encoding='utf-8')
+        workers = options['workers']
+        # Forked children must not inherit an open connection
+        connections.close_all()
+        pool = ProcessPoolExecutor(workers, initializer=init_worker_process)
+
+        self.started = time.perf_counter()
+        try:
+            with stream as lines, pool:
+                pending = None
+                for chunk in chunked(read_records(lines, fmt), options['chunk_size']):
+                    rows = self.new_rows(chunk)
+                    # Hash this chunk in the pool while the previous one is inserted
+                    hashes = pool.map(make_password, [record['password'] for _, record in rows],
+                                      chunksize=max(1, len(rows) // (workers * 4)))
+                    if pending is not None:
+                        self.insert(*pending)
+                    pending = rows, hashes
+                if pending is not None:
+                    self.insert(*pending)
+        except RecordError as e:
+            raise CommandError(f"{path}, {e} ({self.created} accounts were imported before it)")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {self.created} {role}s, skipped {self.skipped} "
+            f"in {time.perf_counter() - self.started:.1f}s"
+        ))
+
+    def skip(self, line, reason):
+        self.skipped += 1
+        self.stderr.write(f"line {line}: {reason}, skipped")
+
+    def new_rows(self, chunk):
+        """The chunk's valid records whose username (and customer email) are not taken."""
+        rows = []
+        for line, record in chunk:
+            missing = [field for field in ('username', 'email', 'password') if not record.get(field)]
+            # NDJSON values can be of any JSON type; hashing a non-string would fail in the pool
+            not_text = [field for field in ('username', 'email', 'password')
+                        if field not in missing and not isinstance(record[field], str)]
+            not_text += [field for field in self.fields
+                         if isinstance(record.get(field), (list, dict))]
+            if missing:
+                self.skip(line, f"missing {', '.join(missing)}")
+            elif not_text:
+                self.skip(line, f"{', '.join(not_text)} must be text")
+            elif record['username'] in self.seen:
+                self.skip(line, f"username {record['username']!r} repeated")
+            else:
+                self.seen.add(record['username'])
+                rows.append((line, record))
+
+        taken = set(User.objects.filter(username__in=[record['username'] for _, record in rows])
+                    .values_list('username', flat=True))
+        taken_emails = set()
+        if self.model is Customer:
+            taken_emails = set(Customer.objects.filter(email__in=[record['email'] for _, record in rows])
+                               .values_list('email', flat=True))
+
+        fresh = []
+        for line, record in rows:
+            if record['username'] in taken:
+                self.skip(line, f"username {record['username']!r} exists")
+            elif record['email'] in taken_emails:
+                self.skip(line, f"customer email {record['email']!r} exists")
+            elif record['email'] in self.seen_emails:
+                self.skip(line, f"customer email {record['email']!r} repeated")
+            else:
+                if self.model is Customer:
+                    self.seen_emails.add(record['email'])
+                fresh.append((line, record))
+        return fresh
+
+    def insert(self, rows, hashes):
+        if not rows:
+            return
+        rows = list(zip(rows, hashes))
+        try:
+            created = self.create_accounts(rows)
+        except IntegrityError:
+            # Taken by another writer since the chunk was checked: find the
+            # conflicting rows one at a time and skip them
+            created = 0
+            for (line, record), password in rows:
+                try:
+                    created += self.create_accounts([((line, record), password)])
+                except IntegrityError:
+                    self.skip(line, f"username {record['username']!r} or its email was taken meanwhile")
+
+        self.created += created
+        rate = self.created / (time.perf_counter() - self.started)
+        self.stdout.write(f"Imported {self.created} accounts, skipped {self.skipped} ({rate:.0f}/s)")
+
+    def create_accounts(self, rows):
+        """Insert ``((line, record), password hash)`` pairs in one transaction; returns the count."""
+        users = [
+            User(username=record['username'], email=record['email'], password=password)
+            for (_, record), password in rows
+        ]
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            if users[0].pk is None:
+                # Backends without INSERT ... RETURNING leave the new ids unset
+                ids = dict(User.objects.filter(username__in=[user.username for user in users])
+                           .values_list('username', 'id'))
+                for user in users:
+                    user.pk = ids[user.username]
+
+            profiles = []
+            for ((_, record), _), user in zip(rows, users):
+                values = {field: str(record.get(field) or '') for field in self.fields}
+                values['name'] = values['name'] or user.username
+                if 'email' in values:
+                    values['email'] = values['email'] or user.email
+                profiles.append(self.model(user=user, **values))
+            self.model.objects.bulk_create(profiles)
+            if self.model is Vendor:
+                record_catalog_changes(profiles)
+        return len(users)
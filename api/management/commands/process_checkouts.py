@@ -0,0 +1,64 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from api.checkout_jobs import process_batch
+from api.events import broker
+from api.workers import init_worker_process
+
+
+class Command(BaseCommand):
+    help = "Place the orders for queued asynchronous checkouts (CheckoutJob)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4,
+                            help="Pool size; each worker runs one batch per transaction")
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread')
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help="Jobs committed together by one worker")
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help="Seconds to wait when the queue is empty")
+        parser.add_argument('--once', action='store_true',
+                            help="Exit once the queue is empty instead of polling")
+
+    def handle(self, *args, **options):
+        # Orders placed here announce themselves to vendor streams through the
+        # broker; an in-process one would deliver them to this process only
+        if not broker.shared:
+            message = ("EVENT_BROKER delivers events within one process, so vendors' order "
+                       "streams will not hear about orders placed by this worker; configure a "
+                       "shared backend such as api.events.SQLiteBackend")
+            if settings.ASYNC_CHECKOUT:
+                raise CommandError(message)
+            self.stderr.write(f"Warning: {message}")
+
+        workers, batch_size = options['workers'], options['batch_size']
+        if options['pool'] == 'process':
+            # Forked children must not inherit an open connection
+            connections.close_all()
+            pool = ProcessPoolExecutor(workers, initializer=init_worker_process)
+        else:
+            pool = ThreadPoolExecutor(workers, thread_name_prefix='checkout')
+
+        processed = 0
+        started = time.perf_counter()
+        try:
+            with pool:
+                while True:
+                    futures = [pool.submit(process_batch, batch_size) for _ in range(workers)]
+                    done = sum(future.result() for future in futures)
+                    processed += done
+                    if done:
+                        rate = processed / (time.perf_counter() - started)
+                        self.stdout.write(f"Processed {processed} checkouts ({rate:.0f}/s)")
+                    elif options['once']:
+                        break
+                    else:
+                        time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} checkouts"))
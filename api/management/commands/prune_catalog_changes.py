@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import CatalogChange
+
+
+class Command(BaseCommand):
+    help = "Delete catalog change journal entries older than --days (clients behind that must reload the catalog)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        # Always keep the newest entry so the current version stays known
+        newest = CatalogChange.objects.order_by('-id').values_list('id', flat=True).first()
+        deleted, _ = CatalogChange.objects.filter(date__lt=cutoff).exclude(id=newest).delete()
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} catalog changes"))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.idempotency import key_ttl
+from api.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Delete stored Idempotency-Key responses older than settings.IDEMPOTENCY_KEY_TTL"
+
+    def handle(self, *args, **options):
+        deleted, _ = IdempotencyKey.objects.filter(created__lt=timezone.now() - key_ttl()).delete()
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} idempotency keys"))
@@ -0,0 +1,48 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from api.outbox import outbox_options, send_batch
+
+
+class Command(BaseCommand):
+    help = ("Send queued emails (OutboxEmail) in batches over one mail connection, "
+            "retrying failures with backoff")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=outbox_options()['BATCH_SIZE'])
+        parser.add_argument('--poll-interval', type=float, default=5.0,
+                            help="Seconds to wait when nothing is due")
+        parser.add_argument('--once', action='store_true',
+                            help="Exit once nothing is due instead of polling")
+        parser.add_argument('--backend',
+                            help="Email backend to use instead of settings.EMAIL_BACKEND, e.g. "
+                                 "django.core.mail.backends.filebased.EmailBackend")
+        parser.add_argument('--file-path',
+                            help="Directory for the file backend (default settings.EMAIL_FILE_PATH)")
+
+    def handle(self, *args, **options):
+        kwargs = {'file_path': options['file_path']} if options['file_path'] else {}
+        connection = get_connection(options['backend'], fail_silently=False, **kwargs)
+
+        totals = {}
+        try:
+            while True:
+                counts = send_batch(connection, options['batch_size'])
+                for outcome, count in counts.items():
+                    totals[outcome] = totals.get(outcome, 0) + count
+                if counts:
+                    summary = ', '.join(f"{count} {outcome}" for outcome, count in sorted(counts.items()))
+                    self.stdout.write(f"Batch: {summary}")
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
+
+        summary = ', '.join(f"{count} {outcome}" for outcome, count in sorted(totals.items())) or 'nothing'
+        self.stdout.write(self.style.SUCCESS(f"Outbox: {summary}"))
@@ -0,0 +1,232 @@
+"""
+Menu import and export as flat CSV or NDJSON, one row per item.
+
+Each row has the item's ``menu`` name, ``name``, ``price``, ``description``,
+``categories`` and ``daily_limit``. In CSV, categories are separated by
+``|``; in NDJSON they are a list. A row with only a ``menu`` stands for a
+menu with no items. The export produces the same rows, so an exported file
+can be imported again.
+
+Both directions stream. ``import_menu_rows`` reads records one at a time and
+commits every ``chunk_size`` rows, with ``create_menu_items`` inserting each
+chunk's items and category links in bulk. ``export_menu_rows`` reads a
+vendor's items in id-ordered pages. Neither holds the whole menu in memory.
+Under ASGI, Django buffers a sync iterator before sending it, so the export
+view wraps the rows in ``iterate_in_thread``.
+
+An import creates a new menu for each distinct menu name in the file, as
+``POST /api/vendor/menus/`` does. It never changes existing menus. Invalid
+rows are skipped and reported. A file that cannot be parsed stops the
+import, and the chunks committed before that point are kept.
+"""
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+
+from .catalog import clean_category_names, create_menu_items, touch_vendor
+from .models import Item, ItemCategory, Menu
+from .records import RecordError, chunked
+
+FIELDS = ['menu', 'name', 'price', 'description', 'categories', 'daily_limit']
+CATEGORY_SEPARATOR = '|'
+MAX_PRICE = Decimal(10) ** 8  # Item.price has 10 digits, 2 after the point
+CONTENT_TYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+# Skipped rows listed in an import report; the count covers them all
+MAX_REPORTED_ERRORS = 100
+
+
+def parse_daily_limit(value):
+    """Parse an item's optional ``daily_limit`` (units per day); None if unlimited."""
+    if value in (None, ''):
+        return None
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("daily_limit must be a whole number")
+    if limit < 0:
+        raise ValueError("daily_limit cannot be negative")
+    return limit
+
+
+def parse_item_row(record):
+    """
+    Validate one imported row. Returns ``(menu name, item fields, category
+    names)``, with ``item fields`` None for a menu-only row. Raises
+    ValueError for an invalid row.
+    """
+    menu = str(record.get('menu') or '').strip()
+    if not menu:
+        raise ValueError("menu is required")
+
+    name = str(record.get('name') or '').strip()
+    price = record.get('price')
+    if not name and price in (None, ''):
+        return menu, None, []
+    if not name:
+        raise ValueError("name is required")
+    try:
+        price = Decimal(str(price).strip())
+    except InvalidOperation:
+        raise ValueError("price must be a valid number")
+    if not price.is_finite() or price < 0:
+        raise ValueError("price must be a non-negative number")
+    price = price.quantize(Decimal('0.01'))
+    if price >= MAX_PRICE:
+        raise ValueError("price is too large")
+
+    categories = record.get('categories') or []
+    if isinstance(categories, str):
+        categories = categories.split(CATEGORY_SEPARATOR)
+    elif not isinstance(categories, list):
+        raise ValueError("categories must be a list")
+
+    fields = {
+        'name': name,
+        'price': price,
+        'description': str(record.get('description') or '').strip(),
+        'daily_stock_limit': parse_daily_limit(record.get('daily_limit')),
+    }
+    return menu, fields, clean_category_names(categories)
+
+
+class MenuImport:
+    """Running totals of one import; ``menus`` maps each menu name in the file to its new Menu."""
+
+    def __init__(self, vendor):
+        self.vendor = vendor
+        self.menus = {}
+        self.items = 0
+        self.skipped = 0
+        self.errors = []
+        self.error = None
+
+    def skip(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def summary(self):
+        summary = {
+            "menus": [{"menuId": menu.id, "menuName": menu.name} for menu in self.menus.values()],
+            "itemsImported": self.items,
+            "rowsSkipped": self.skipped,
+            "errors": self.errors,
+        }
+        if self.error:
+            summary["error"] = self.error
+        return summary
+
+
+def import_menu_rows(vendor, records, chunk_size=500, progress=None):
+    """
+    Import ``(line, record)`` pairs (see ``records.read_records``) into new
+    menus of ``vendor``, one transaction per chunk. ``progress`` is called
+    with the ``MenuImport`` after each chunk commits; the same object is
+    returned at the end, with ``error`` set if the file stopped parsing.
+    """
+    result = MenuImport(vendor)
+    chunks = chunked(records, chunk_size)
+    while True:
+        try:
+            chunk = next(chunks, None)
+        except (RecordError, csv.Error, UnicodeDecodeError) as e:
+            # The file is unreadable from here on; keep what was committed
+            result.error = f"Import stopped: {e}"
+            break
+        if chunk is None:
+            break
+
+        with transaction.atomic():
+            entries = []
+            new_menus = False
+            for line, record in chunk:
+                try:
+                    menu_name, fields, categories = parse_item_row(record)
+                except ValueError as e:
+                    result.skip(line, str(e))
+                    continue
+                menu = result.menus.get(menu_name)
+                if menu is None:
+                    menu = result.menus[menu_name] = Menu.objects.create(vendor=vendor, name=menu_name)
+                    new_menus = True
+                if fields is not None:
+                    entries.append((Item(vendor=vendor, menu=menu, **fields), categories))
+
+            if entries:
+                create_menu_items(entries)
+            if entries or new_menus:
+                touch_vendor(vendor.id)
+        result.items += len(entries)
+        if progress is not None:
+            progress(result)
+    return result
+
+
+def export_menu_rows(vendor, page_size=500):
+    """Yield a row dict for every item of ``vendor``, and one for each menu without items."""
+    for menu in Menu.objects.filter(vendor=vendor).order_by('id'):
+        last_id = 0
+        empty = True
+        while True:
+            items = list(Item.objects.filter(menu=menu, id__gt=last_id).order_by('id')[:page_size])
+            if not items:
+                break
+            last_id = items[-1].id
+            empty = False
+
+            categories = {}
+            for item_id, name in (ItemCategory.objects
+                                  .filter(item__in=items)
+                                  .order_by('id')
+                                  .values_list('item_id', 'category__name')):
+                categories.setdefault(item_id, []).append(name)
+
+            for item in items:
+                yield {
+                    'menu': menu.name,
+                    'name': item.name,
+                    'price': float(item.price),
+                    'description': item.description or '',
+                    'categories': categories.get(item.id, []),
+                    'daily_limit': item.daily_stock_limit,
+                }
+        if empty:
+            yield {'menu': menu.name}
+
+
+class _Echo:
+    """File-like object whose ``write`` returns the line, for ``csv.writer`` in a generator."""
+
+    def write(self, value):
+        return value
+
+
+def render_rows(rows, fmt):
+    """Yield ``rows`` encoded as CSV or NDJSON text, one line at a time."""
+    if fmt == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(FIELDS)
+        for row in rows:
+            row = {**row, 'categories': CATEGORY_SEPARATOR.join(row.get('categories', []))}
+            yield writer.writerow(['' if row.get(field) is None else row[field] for field in FIELDS])
+    elif fmt == 'ndjson':
+        for row in rows:
+            yield json.dumps(row) + '\n'
+    else:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(CONTENT_TYPES)}")
+
+
+async def iterate_in_thread(lines, batch_size=100):
+    """
+    Async iterator over the text ``lines`` for a StreamingHttpResponse under
+    ASGI. Lines are pulled ``batch_size`` at a time in the sync thread, since
+    producing them runs database queries, and each batch is sent as one chunk.
+    """
+    lines = iter(lines)
+    next_batch = sync_to_async(lambda: list(islice(lines, batch_size)))
+    while batch := await next_batch():
+        yield ''.join(batch)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_order_comment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vendor',
+            name='catalog_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:30
+
+from django.db import migrations, models
+
+
+def seed_journal(apps, schema_editor):
+    """Record every existing catalog row so a sync from version 0 sees the full catalog."""
+    CatalogChange = apps.get_model('api', 'CatalogChange')
+    Vendor = apps.get_model('api', 'Vendor')
+    Menu = apps.get_model('api', 'Menu')
+    Item = apps.get_model('api', 'Item')
+    Category = apps.get_model('api', 'Category')
+
+    changes = [CatalogChange(kind='vendor', object_id=pk, vendor_id=pk)
+               for pk in Vendor.objects.values_list('id', flat=True)]
+    changes += [CatalogChange(kind='menu', object_id=pk, vendor_id=vendor_id)
+                for pk, vendor_id in Menu.objects.values_list('id', 'vendor_id')]
+    changes += [CatalogChange(kind='item', object_id=pk, vendor_id=vendor_id)
+                for pk, vendor_id in Item.objects.values_list('id', 'vendor_id')]
+    changes += [CatalogChange(kind='category', object_id=pk, vendor_id=vendor_id)
+                for pk, vendor_id in Category.objects.values_list('id', 'item__vendor_id')]
+    CatalogChange.objects.bulk_create(changes, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_vendor_catalog_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('vendor', 'Vendor'), ('menu', 'Menu'), ('item', 'Item'), ('category', 'Category')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('vendor_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('deleted', models.BooleanField(default=False)),
+                ('date', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RunPython(seed_journal, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,107 @@
+from django.db import migrations
+
+
+# Full-text index over items, kept in sync by triggers so every write path
+# (views, admin, bulk_create, raw SQL) updates it. rowid is the item id.
+FTS_ITEM_ROW = """
+    SELECT i.id, i.name, COALESCE(i.description, ''),
+           COALESCE((SELECT group_concat(c.name, ' ') FROM api_category c WHERE c.item_id = i.id), ''),
+           COALESCE((SELECT v.name FROM api_vendor v WHERE v.id = i.vendor_id), '')
+    FROM api_item i
+"""
+
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE api_item_fts USING fts5(
+        name, description, categories, vendor,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    f"INSERT INTO api_item_fts (rowid, name, description, categories, vendor) {FTS_ITEM_ROW}",
+    f"""
+    CREATE TRIGGER api_item_fts_ai AFTER INSERT ON api_item BEGIN
+        INSERT INTO api_item_fts (rowid, name, description, categories, vendor)
+        {FTS_ITEM_ROW} WHERE i.id = new.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER api_item_fts_au AFTER UPDATE ON api_item BEGIN
+        DELETE FROM api_item_fts WHERE rowid = old.id;
+        INSERT INTO api_item_fts (rowid, name, description, categories, vendor)
+        {FTS_ITEM_ROW} WHERE i.id = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER api_item_fts_ad AFTER DELETE ON api_item BEGIN
+        DELETE FROM api_item_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER api_category_fts_ai AFTER INSERT ON api_category BEGIN
+        UPDATE api_item_fts SET categories = COALESCE(
+            (SELECT group_concat(name, ' ') FROM api_category WHERE item_id = new.item_id), '')
+        WHERE rowid = new.item_id;
+    END
+    """,
+    """
+    CREATE TRIGGER api_category_fts_au AFTER UPDATE ON api_category BEGIN
+        UPDATE api_item_fts SET categories = COALESCE(
+            (SELECT group_concat(name, ' ') FROM api_category WHERE item_id = old.item_id), '')
+        WHERE rowid = old.item_id;
+        UPDATE api_item_fts SET categories = COALESCE(
+            (SELECT group_concat(name, ' ') FROM api_category WHERE item_id = new.item_id), '')
+        WHERE rowid = new.item_id;
+    END
+    """,
+    """
+    CREATE TRIGGER api_category_fts_ad AFTER DELETE ON api_category BEGIN
+        UPDATE api_item_fts SET categories = COALESCE(
+            (SELECT group_concat(name, ' ') FROM api_category WHERE item_id = old.item_id), '')
+        WHERE rowid = old.item_id;
+    END
+    """,
+    """
+    CREATE TRIGGER api_vendor_fts_au AFTER UPDATE OF name ON api_vendor BEGIN
+        UPDATE api_item_fts SET vendor = new.name
+        WHERE rowid IN (SELECT id FROM api_item WHERE vendor_id = new.id);
+    END
+    """,
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS api_vendor_fts_au",
+    "DROP TRIGGER IF EXISTS api_category_fts_ad",
+    "DROP TRIGGER IF EXISTS api_category_fts_au",
+    "DROP TRIGGER IF EXISTS api_category_fts_ai",
+    "DROP TRIGGER IF EXISTS api_item_fts_ad",
+    "DROP TRIGGER IF EXISTS api_item_fts_au",
+    "DROP TRIGGER IF EXISTS api_item_fts_ai",
+    "DROP TABLE IF EXISTS api_item_fts",
+]
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite only; other databases fall back to plain lookups (api/search.py)
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_catalogchange'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,163 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def merge_categories(apps, schema_editor):
+    """
+    Collapse the per-item category rows into one shared tag per name.
+
+    The lowest id of each name survives and every item that used the name
+    is linked to it; the duplicates are deleted and journaled as tombstones.
+    """
+    Category = apps.get_model('api', 'Category')
+    ItemCategory = apps.get_model('api', 'ItemCategory')
+    CatalogChange = apps.get_model('api', 'CatalogChange')
+
+    canonical = {}  # name -> surviving category id
+    links = set()
+    duplicates = []
+    for category_id, item_id, name in Category.objects.order_by('id').values_list('id', 'item_id', 'name'):
+        name = name.strip()
+        if name not in canonical:
+            canonical[name] = category_id
+            Category.objects.filter(id=category_id).update(name=name, description=None)
+        else:
+            duplicates.append(category_id)
+        links.add((item_id, canonical[name]))
+
+    ItemCategory.objects.bulk_create(
+        [ItemCategory(item_id=item_id, category_id=category_id) for item_id, category_id in sorted(links)],
+        batch_size=500,
+    )
+    Category.objects.filter(id__in=duplicates).delete()
+
+    changes = [CatalogChange(kind='category', object_id=category_id, deleted=True) for category_id in duplicates]
+    changes += [CatalogChange(kind='item', object_id=item_id) for item_id in sorted({item_id for item_id, _ in links})]
+    CatalogChange.objects.bulk_create(changes, batch_size=500)
+
+
+# The search index (0009) computed item categories from api_category.item_id;
+# from here on they come from the api_itemcategory join table.
+FTS_CATEGORIES = """
+    COALESCE((SELECT group_concat(c.name, ' ') FROM api_itemcategory ic
+              JOIN api_category c ON c.id = ic.category_id
+              WHERE ic.item_id = {item_id}), '')
+"""
+
+# SQLite rebuilds api_item and api_category below, and table renames fail
+# while triggers reference them, so every search trigger is dropped up front
+# and recreated at the end.
+DROP_OLD_TRIGGERS_SQL = [
+    "DROP TRIGGER IF EXISTS api_vendor_fts_au",
+    "DROP TRIGGER IF EXISTS api_category_fts_ai",
+    "DROP TRIGGER IF EXISTS api_category_fts_au",
+    "DROP TRIGGER IF EXISTS api_category_fts_ad",
+    "DROP TRIGGER IF EXISTS api_item_fts_ai",
+    "DROP TRIGGER IF EXISTS api_item_fts_au",
+    "DROP TRIGGER IF EXISTS api_item_fts_ad",
+]
+
+CREATE_TRIGGERS_SQL = [
+    f"""
+    CREATE TRIGGER api_item_fts_ai AFTER INSERT ON api_item BEGIN
+        INSERT INTO api_item_fts (rowid, name, description, categories, vendor)
+        VALUES (new.id, new.name, COALESCE(new.description, ''),
+                {FTS_CATEGORIES.format(item_id='new.id')},
+                COALESCE((SELECT name FROM api_vendor WHERE id = new.vendor_id), ''));
+    END
+    """,
+    f"""
+    CREATE TRIGGER api_item_fts_au AFTER UPDATE ON api_item BEGIN
+        DELETE FROM api_item_fts WHERE rowid = old.id;
+        INSERT INTO api_item_fts (rowid, name, description, categories, vendor)
+        VALUES (new.id, new.name, COALESCE(new.description, ''),
+                {FTS_CATEGORIES.format(item_id='new.id')},
+                COALESCE((SELECT name FROM api_vendor WHERE id = new.vendor_id), ''));
+    END
+    """,
+    """
+    CREATE TRIGGER api_item_fts_ad AFTER DELETE ON api_item BEGIN
+        DELETE FROM api_item_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER api_vendor_fts_au AFTER UPDATE OF name ON api_vendor BEGIN
+        UPDATE api_item_fts SET vendor = new.name
+        WHERE rowid IN (SELECT id FROM api_item WHERE vendor_id = new.id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER api_itemcategory_fts_ai AFTER INSERT ON api_itemcategory BEGIN
+        UPDATE api_item_fts SET categories = {FTS_CATEGORIES.format(item_id='new.item_id')}
+        WHERE rowid = new.item_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER api_itemcategory_fts_ad AFTER DELETE ON api_itemcategory BEGIN
+        UPDATE api_item_fts SET categories = {FTS_CATEGORIES.format(item_id='old.item_id')}
+        WHERE rowid = old.item_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER api_category_fts_au AFTER UPDATE OF name ON api_category BEGIN
+        UPDATE api_item_fts SET categories = {FTS_CATEGORIES.format(item_id='api_item_fts.rowid')}
+        WHERE rowid IN (SELECT item_id FROM api_itemcategory WHERE category_id = new.id);
+    END
+    """,
+    f"UPDATE api_item_fts SET categories = {FTS_CATEGORIES.format(item_id='api_item_fts.rowid')}",
+]
+
+
+def drop_old_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_OLD_TRIGGERS_SQL:
+        schema_editor.execute(sql)
+
+
+def create_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in CREATE_TRIGGERS_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_item_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_old_search_triggers, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='ItemCategory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='item_categories', to='api.category')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='item_categories', to='api.item')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='categories',
+            field=models.ManyToManyField(blank=True, related_name='items', through='api.ItemCategory', to='api.category'),
+        ),
+        migrations.AddConstraint(
+            model_name='itemcategory',
+            constraint=models.UniqueConstraint(fields=('item', 'category'), name='unique_item_category'),
+        ),
+        migrations.RunPython(merge_categories, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='category',
+            name='item',
+        ),
+        migrations.AlterField(
+            model_name='category',
+            name='name',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.RunPython(create_search_triggers, migrations.RunPython.noop),
+    ]
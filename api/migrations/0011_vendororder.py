@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_normalize_categories'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateTimeField()),
+                ('subtotal', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('item_count', models.PositiveIntegerField(default=0)),
+                ('status', models.CharField(blank=True, max_length=50)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vendor_orders', to='api.order')),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vendor_orders', to='api.vendor')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['vendor', '-date', '-id'], name='vendor_order_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('vendor', 'order'), name='unique_vendor_order')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_vendororder'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contain',
+            name='item_description',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='contain',
+            name='item_name',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='contain',
+            name='unit_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='contain',
+            name='vendor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_lines', to='api.vendor'),
+        ),
+        migrations.AddField(
+            model_name='contain',
+            name='vendor_name',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:46
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_lines(apps, schema_editor):
+    """Fold repeated (cart, item) lines into the oldest one, adding up the quantities."""
+    CartItem = apps.get_model('api', 'CartItem')
+    duplicates = (CartItem.objects.values('cart_id', 'item_id')
+                  .annotate(lines=Count('id'), first=Min('id'), quantity=Sum('quantity'))
+                  .filter(lines__gt=1))
+    for line in duplicates:
+        CartItem.objects.filter(id=line['first']).update(quantity=line['quantity'])
+        CartItem.objects.filter(cart_id=line['cart_id'], item_id=line['item_id']).exclude(id=line['first']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_stock_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_lines, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('cart', 'item'), name='unique_cart_item'),
+        ),
+    ]
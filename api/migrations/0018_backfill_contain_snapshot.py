@@ -0,0 +1,43 @@
+from django.db import migrations
+
+BATCH_SIZE = 500
+
+
+def snapshot_order_lines(apps, schema_editor):
+    """
+    Copy item price and names onto order lines written before they were
+    snapshotted at checkout (0012). The current catalog is the best record
+    left for those orders.
+    """
+    Contain = apps.get_model('api', 'Contain')
+    last_id = 0
+    while True:
+        lines = list(Contain.objects
+                     .filter(id__gt=last_id, unit_price__isnull=True)
+                     .select_related('item__vendor')
+                     .order_by('id')[:BATCH_SIZE])
+        if not lines:
+            break
+        last_id = lines[-1].id
+
+        for line in lines:
+            item = line.item
+            line.vendor_id = item.vendor_id
+            line.unit_price = item.price
+            line.item_name = item.name
+            line.item_description = item.description or ''
+            line.vendor_name = item.vendor.name
+        Contain.objects.bulk_update(
+            lines, ['vendor', 'unit_price', 'item_name', 'item_description', 'vendor_name']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_outboxemail'),
+    ]
+
+    operations = [
+        migrations.RunPython(snapshot_order_lines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+from django.db import migrations
+from django.db.models import DecimalField, F, Sum
+
+BATCH_SIZE = 500
+
+
+def create_vendor_orders(apps, schema_editor):
+    """
+    Create the per-vendor sub-orders (0011) of orders placed before they
+    existed. Subtotals use the prices on the order lines (snapshotted by
+    0018), so past orders keep the prices they were sold at.
+    """
+    Contain = apps.get_model('api', 'Contain')
+    Order = apps.get_model('api', 'Order')
+    VendorOrder = apps.get_model('api', 'VendorOrder')
+    last_id = 0
+    while True:
+        orders = list(Order.objects
+                      .filter(id__gt=last_id, vendor_orders__isnull=True)
+                      .order_by('id')
+                      .values('id', 'date', 'status')[:BATCH_SIZE])
+        if not orders:
+            break
+        last_id = orders[-1]['id']
+        by_id = {order['id']: order for order in orders}
+
+        # One grouped query per batch: each (order, vendor) pair with its totals
+        shares = (Contain.objects
+                  .filter(order_id__in=by_id)
+                  .values('order_id', 'vendor_id')
+                  .annotate(
+                      subtotal=Sum(F('unit_price') * F('quantity'),
+                                   output_field=DecimalField(max_digits=10, decimal_places=2)),
+                      item_count=Sum('quantity'),
+                  ))
+        VendorOrder.objects.bulk_create([
+            VendorOrder(
+                vendor_id=share['vendor_id'],
+                order_id=share['order_id'],
+                date=by_id[share['order_id']]['date'],
+                subtotal=share['subtotal'],
+                item_count=share['item_count'],
+                status=by_id[share['order_id']]['status'] or '',
+            )
+            for share in shares
+        ], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_backfill_contain_snapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_vendor_orders, migrations.RunPython.noop),
+    ]
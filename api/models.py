@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 # Update Customer model to link with User
 class Customer(models.Model):
@@ -29,6 +30,9 @@ class Vendor(models.Model):
     name = models.CharField(max_length=100)
     location = models.CharField(max_length=255, blank=True)
     working_hours = models.CharField(max_length=100, blank=True)
+    # Bumped whenever this vendor's menus/items change so cached catalog
+    # snapshots (see api/catalog.py) know which subtree to rebuild
+    catalog_version = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.name
@@ -71,6 +75,8 @@ class Item(models.Model):
     name = models.CharField(max_length=100)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     description = models.TextField(blank=True, null=True)
+    categories = models.ManyToManyField('Category', through='ItemCategory', related_name='items', blank=True)
+    daily_stock_limit = models.PositiveIntegerField(null=True, blank=True)  # units per day; None means unlimited
 
     def __str__(self):
         return self.name
@@ -78,14 +84,55 @@ class Item(models.Model):
 
 class Category(models.Model):
     """
-    Stores categories that belong to a vendor.
+    A category tag (e.g. "vegan") shared by every item it is applied to.
     """
-    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='categories')
-    name = models.CharField(max_length=100)
+    name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True, null=True)
 
     def __str__(self):
-        return f"{self.name} ({self.item.name})"
+        return self.name
+
+
+class ItemCategory(models.Model):
+    """
+    Links an item to one of its category tags.
+    """
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='item_categories')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='item_categories')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'category'], name='unique_item_category'),
+        ]
+
+    def __str__(self):
+        return f"{self.item.name} is {self.category.name}"
+
+
+class CatalogChange(models.Model):
+    """
+    Append-only journal of catalog writes, used for delta sync.
+
+    The id of the newest row is the catalog version clients sync from.
+    Deletes are recorded as tombstones; ``vendor_id`` is a plain integer
+    so entries outlive the rows they describe.
+    """
+    KIND_CHOICES = [
+        ('vendor', 'Vendor'),
+        ('menu', 'Menu'),
+        ('item', 'Item'),
+        ('category', 'Category'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    vendor_id = models.PositiveBigIntegerField(null=True, blank=True)
+    deleted = models.BooleanField(default=False)
+    date = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        action = "deleted" if self.deleted else "changed"
+        return f"#{self.pk} {self.kind} {self.object_id} {action}"
 
 
 # Add this to your models.py - Update the Order model
@@ -105,13 +152,47 @@ class Order(models.Model):
         return f"Order #{self.pk} by {self.customer.name}"
 
 
+class VendorOrder(models.Model):
+    """
+    One vendor's share of an order, written at checkout alongside the order
+    lines so vendor dashboards read a single indexed range.
+    """
+    vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE, related_name='vendor_orders')
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='vendor_orders')
+    date = models.DateTimeField()  # copy of order.date, for the (vendor, date) index
+    subtotal = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    item_count = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=50, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['vendor', 'order'], name='unique_vendor_order'),
+        ]
+        indexes = [
+            models.Index(fields=['vendor', '-date', '-id'], name='vendor_order_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.vendor.name}'s part of Order #{self.order_id}"
+
+
 class Contain(models.Model):
+    """
+    One line of an order. Price and names are copied from the item and its
+    vendor at checkout, so order history stays as it was sold and can be read
+    without joining ``Item`` or ``Vendor``.
+    """
     order = models.ForeignKey(Order, on_delete=models.CASCADE)
     item = models.ForeignKey(Item, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField()
+    vendor = models.ForeignKey(Vendor, on_delete=models.SET_NULL, null=True, blank=True, related_name='order_lines')
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    item_name = models.CharField(max_length=100, blank=True)
+    item_description = models.TextField(blank=True)
+    vendor_name = models.CharField(max_length=100, blank=True)
 
     def __str__(self):
-        return f"{self.order} contains {self.item.name}"
+        return f"{self.order} contains {self.item_name}"
 
 
 class Manage(models.Model):
@@ -148,5 +229,132 @@ class CartItem(models.Model):
     item = models.ForeignKey(Item, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
 
+    class Meta:
+        constraints = [
+            # One line per item, so lines can be upserted on (cart, item)
+            models.UniqueConstraint(fields=['cart', 'item'], name='unique_cart_item'),
+        ]
+
+    def __str__(self):
+        return f"{self.item.name} x {self.quantity}"
+
+class IdempotencyKey(models.Model):
+    """
+    First response to a write sent with an ``Idempotency-Key`` header,
+    replayed when a client retries with the same key (see api/idempotency.py).
+    ``status_code`` is null while that first request is still running;
+    ``headers`` are the ones the view set on the response (e.g. ``Location``).
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    body = models.TextField(blank=True)
+    headers = models.JSONField(default=dict, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_user_idempotency_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.user})"
+
+
+class CheckoutJob(models.Model):
+    """
+    A checkout accepted by ``CheckoutView`` in async mode and turned into an
+    order by the ``process_checkouts`` worker (see api/checkout_jobs.py).
+    The cart is checked out as it is when the job runs.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='checkout_jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    payment_method = models.CharField(max_length=50, blank=True)
+    comment = models.TextField(blank=True)
+    order = models.ForeignKey(Order, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='checkout_job_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"Checkout job #{self.pk} ({self.status})"
+
+
+class StockCounter(models.Model):
+    """
+    One shard of an item's reserved units for a day. Each item with a daily
+    limit has ``settings.STOCK_COUNTER_SHARDS`` rows per day, each allowed
+    its share of the limit; checkouts reserve on a random shard so they do
+    not all queue on one row (see api/inventory.py).
+    """
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='stock_counters')
+    day = models.DateField()
+    shard = models.PositiveSmallIntegerField()
+    reserved = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'day', 'shard'], name='unique_stock_counter_shard'),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id} on {self.day} shard {self.shard}: {self.reserved}"
+
+
+class StockReservation(models.Model):
+    """Units an order took from one counter shard, given back if it is cancelled."""
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='stock_reservations')
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='+')
+    day = models.DateField()
+    shard = models.PositiveSmallIntegerField()
+    quantity = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"Order #{self.order_id}: {self.quantity} x {self.item_id}"
+
+
+class OutboxEmail(models.Model):
+    """
+    An email waiting to be sent by the ``send_outbox`` worker (see
+    api/outbox.py). Rows are written in the same transaction as the change
+    that caused them. A row with a ``template`` is rendered when it is sent
+    rather than when it is queued.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('dropped', 'Dropped'),
+        ('failed', 'Failed'),
+    ]
+
+    template = models.CharField(max_length=50, blank=True)
+    to = models.JSONField(default=list)
+    subject = models.CharField(max_length=255, blank=True)
+    body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    sent = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt'], name='outbox_email_due_idx'),
+        ]
+
     def __str__(self):
-        return f"{self.item.name} x {self.quantity}"
\ No newline at end of file
+        return f"Email #{self.pk} to {', '.join(self.to)} ({self.status})"
@@ -0,0 +1,185 @@
+"""
+Helpers shared by the checkout and order views.
+"""
+import time
+from decimal import Decimal
+
+from django.db import transaction
+
+from .cart_store import cart_store
+from .events import broker, vendor_channel
+from .inventory import release_stock, reserve_stock
+from .models import Cart, CartItem, Contain, Order, VendorOrder
+
+
+class EmptyCartError(Exception):
+    """The cart has no lines (or was just checked out by a concurrent request)."""
+
+
+class StageTimer:
+    """Wall-clock time per named stage, reported as a ``Server-Timing`` header."""
+
+    def __init__(self):
+        self.stages = []
+        self._started = self._last = time.perf_counter()
+
+    def mark(self, name):
+        """Close the stage that ran since the previous mark."""
+        now = time.perf_counter()
+        self.stages.append((name, (now - self._last) * 1000))
+        self._last = now
+
+    def header(self):
+        total = (self._last - self._started) * 1000
+        return ', '.join(f"{name};dur={ms:.1f}" for name, ms in [*self.stages, ('total', total)])
+
+
+def order_line(order, item, quantity):
+    """
+    Build an (unsaved) order line that snapshots the item's price and name
+    and its vendor's name as they are right now. ``item.vendor`` should be
+    loaded already.
+    """
+    return Contain(
+        order=order,
+        item=item,
+        quantity=quantity,
+        vendor_id=item.vendor_id,
+        unit_price=item.price,
+        item_name=item.name,
+        item_description=item.description or '',
+        vendor_name=item.vendor.name,
+    )
+
+
+def split_by_vendor(order, lines):
+    """
+    Build (unsaved) per-vendor sub-orders for ``order``.
+
+    ``lines`` is an iterable of ``(item, quantity)``; each vendor gets one
+    ``VendorOrder`` with its subtotal and number of units.
+    """
+    shares = {}
+    for item, quantity in lines:
+        share = shares.get(item.vendor_id)
+        if share is None:
+            share = shares[item.vendor_id] = VendorOrder(
+                vendor_id=item.vendor_id,
+                order=order,
+                date=order.date,
+                subtotal=Decimal('0'),
+                item_count=0,
+                status=order.status,
+            )
+        share.subtotal += item.price * quantity
+        share.item_count += quantity
+    return list(shares.values())
+
+
+def publish_vendor_orders(vendor_orders, event_type, customer_name=None):
+    """
+    Push an event about each sub-order to its vendor's stream.
+
+    Call from ``transaction.on_commit`` so clients never hear about an order
+    that was rolled back.
+    """
+    for vendor_order in vendor_orders:
+        broker.publish(vendor_channel(vendor_order.vendor_id), {
+            "type": event_type,
+            "orderId": vendor_order.order_id,
+            "orderDate": vendor_order.date.isoformat(),
+            "customerName": customer_name,
+            "totalOrderPrice": float(vendor_order.subtotal),
+            "itemCount": vendor_order.item_count,
+            "status": vendor_order.status or "Pending",
+        })
+
+
+def place_order(customer, payment_method='Cash', comment=None, timer=None):
+    """
+    Turn ``customer``'s cart into an order in one transaction.
+
+    The cart row is locked first (``select_for_update``; SQLite takes the
+    database write lock at ``BEGIN``, see ``DATABASES``), so a double-submit
+    waits for the first checkout and then finds the cart empty instead of
+    ordering it twice. Whatever the cart size this is a fixed number of
+    queries: lock, load lines with items and vendors, insert the order,
+    bulk-insert its lines and sub-orders, empty the cart (plus a stock
+    reservation per line whose item has a daily limit).
+
+    Returns ``(order, cart_items)``. Raises ``Cart.DoesNotExist``,
+    ``EmptyCartError`` or ``inventory.OutOfStockError``.
+    """
+    timer = timer or StageTimer()
+    with transaction.atomic():
+        cart = Cart.objects.select_for_update().get(customer=customer)
+        timer.mark('lock')
+
+        cart_items = list(CartItem.objects
+                          .filter(cart=cart)
+                          .select_related('item__vendor')
+                          .order_by('id'))
+        if not cart_items:
+            raise EmptyCartError()
+        timer.mark('load')
+
+        order = Order.objects.create(
+            customer=customer,
+            total_amount=sum(cart_item.item.price * cart_item.quantity for cart_item in cart_items),
+            status='Pending',
+            payment_method=payment_method,
+            comment=comment or None,
+        )
+        reserve_stock(order, [(cart_item.item, cart_item.quantity) for cart_item in cart_items])
+        timer.mark('reserve')
+
+        # Price and names are frozen on the lines for order history
+        Contain.objects.bulk_create([
+            order_line(order, cart_item.item, cart_item.quantity) for cart_item in cart_items
+        ])
+        # Each vendor's share of the order, read by VendorOrdersView
+        vendor_orders = VendorOrder.objects.bulk_create(split_by_vendor(
+            order, ((cart_item.item, cart_item.quantity) for cart_item in cart_items)
+        ))
+        CartItem.objects.filter(cart=cart).delete()
+        # Drop the cached cart while the cart row is still locked, so a
+        # write-behind flush waiting on the lock finds nothing to write back
+        cart_store.forget(customer.id)
+        timer.mark('write')
+
+        # Tell connected vendors once the order is committed
+        transaction.on_commit(
+            lambda: publish_vendor_orders(vendor_orders, 'order.created', customer.name)
+        )
+    timer.mark('commit')
+    return order, cart_items
+
+
+class OrderNotCancellableError(Exception):
+    """The order has moved past ``Pending`` and can no longer be cancelled."""
+
+
+def cancel_order(order_id, customer):
+    """
+    Cancel one of ``customer``'s pending orders: mark it and its vendor
+    sub-orders ``Cancelled``, give its reserved stock back, and tell the
+    vendors once committed. Raises ``Order.DoesNotExist`` or
+    ``OrderNotCancellableError``.
+    """
+    with transaction.atomic():
+        order = Order.objects.select_for_update().get(id=order_id, customer=customer)
+        if (order.status or 'Pending') != 'Pending':
+            raise OrderNotCancellableError(f"Order #{order.id} is {order.status} and can no longer be cancelled")
+
+        order.status = 'Cancelled'
+        order.save(update_fields=['status'])
+        vendor_orders = list(VendorOrder.objects.filter(order=order))
+        VendorOrder.objects.filter(order=order).update(status=order.status)
+        for vendor_order in vendor_orders:
+            vendor_order.status = order.status
+        release_stock(order)
+
+        transaction.on_commit(
+            lambda: publish_vendor_orders(vendor_orders, 'order.cancelled', customer.name)
+        )
+    return order
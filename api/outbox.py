@@ -0,0 +1,145 @@
+"""
+Transactional email outbox.
+
+Requests never talk to the mail server. They add an ``OutboxEmail`` row in
+their own transaction (so an email exists exactly when the change that
+caused it commits), and the ``send_outbox`` command delivers the rows in
+batches over one reused connection.
+
+The worker leases a batch in a short transaction: it counts the attempt and
+pushes ``next_attempt`` out by ``LEASE`` seconds, so the rows are skipped by
+other workers and retried if this one dies. A failed send is retried after
+an exponential backoff until ``MAX_ATTEMPTS``, then marked ``failed``.
+
+Rows with a ``template`` are rendered at send time by the function in
+``TEMPLATES``. The password reset queues only the address it was given; the
+worker looks up its accounts and makes the reset links, and drops the row if
+there are none. The endpoint does the same single insert for known and
+unknown addresses.
+"""
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from .models import OutboxEmail
+
+DEFAULTS = {
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 6,
+    'RETRY_DELAY': 30,
+    'MAX_RETRY_DELAY': 60 * 60,
+    'LEASE': 5 * 60,
+}
+
+
+def outbox_options():
+    return {**DEFAULTS, **getattr(settings, 'EMAIL_OUTBOX', {})}
+
+
+def queue_email(to, subject='', body='', from_email='', template=''):
+    """
+    Queue a message, or with ``template`` (a key of ``TEMPLATES``) one to be
+    rendered at send time; it is sent only if the current transaction commits.
+    """
+    return OutboxEmail.objects.create(to=list(to), subject=subject, body=body,
+                                      from_email=from_email, template=template)
+
+
+def queue_password_reset(email):
+    return queue_email([email], template='password_reset')
+
+
+def password_reset_messages(outbox_email):
+    User = get_user_model()
+    messages = []
+    for user in User.objects.filter(email__in=outbox_email.to, is_active=True):
+        token = default_token_generator.make_token(user)
+        uid = urlsafe_base64_encode(force_bytes(user.pk))
+        reset_link = f"http://example.com/reset-password/{uid}/{token}/"
+        messages.append(EmailMessage(
+            'Password Reset Request',
+            f'Click the link to reset your password: {reset_link}',
+            'from@example.com',
+            [user.email],
+        ))
+    return messages
+
+
+TEMPLATES = {
+    'password_reset': password_reset_messages,
+}
+
+
+def render(outbox_email):
+    """The messages to send for a row; an empty list means there is no one to send to."""
+    if outbox_email.template:
+        return TEMPLATES[outbox_email.template](outbox_email)
+    return [EmailMessage(outbox_email.subject, outbox_email.body,
+                         outbox_email.from_email or None, outbox_email.to)]
+
+
+def retry_delay(attempts, options=None):
+    """Seconds to wait after the ``attempts``-th failure: doubling, capped, with jitter."""
+    options = options or outbox_options()
+    delay = min(options['RETRY_DELAY'] * 2 ** (attempts - 1), options['MAX_RETRY_DELAY'])
+    return delay * random.uniform(0.8, 1.0)
+
+
+def claim_batch(batch_size):
+    """Lease up to ``batch_size`` due rows to this worker."""
+    now = timezone.now()
+    lease = now + timedelta(seconds=outbox_options()['LEASE'])
+    with transaction.atomic():
+        batch = list(OutboxEmail.objects
+                     .select_for_update(skip_locked=True)
+                     .filter(status='pending', next_attempt__lte=now)
+                     .order_by('next_attempt', 'id')[:batch_size])
+        for outbox_email in batch:
+            outbox_email.attempts += 1
+            outbox_email.next_attempt = lease
+        OutboxEmail.objects.bulk_update(batch, ['attempts', 'next_attempt'])
+    return batch
+
+
+def send_batch(connection, batch_size=None):
+    """
+    Send one leased batch over ``connection`` (an email backend instance) and
+    record the outcome of each row. Returns ``{status: count}``.
+    """
+    options = outbox_options()
+    batch = claim_batch(batch_size or options['BATCH_SIZE'])
+    counts = {}
+    for outbox_email in batch:
+        try:
+            messages = render(outbox_email)
+            for message in messages:
+                message.connection = connection
+            if messages:
+                # Backends close a connection they opened inside send_messages;
+                # opening it here keeps it for the rest of the batch
+                connection.open()
+                connection.send_messages(messages)
+            outbox_email.status = 'sent' if messages else 'dropped'
+            outbox_email.sent = timezone.now()
+            outbox_email.last_error = ''
+        except Exception as e:
+            outbox_email.last_error = f"{type(e).__name__}: {e}"
+            if outbox_email.attempts >= options['MAX_ATTEMPTS']:
+                outbox_email.status = 'failed'
+            else:
+                outbox_email.next_attempt = timezone.now() + timedelta(
+                    seconds=retry_delay(outbox_email.attempts, options))
+            # The server may have hung up; reconnect for the next message
+            connection.close()
+        counts[outbox_email.status] = counts.get(outbox_email.status, 0) + 1
+
+    OutboxEmail.objects.bulk_update(batch, ['status', 'next_attempt', 'last_error', 'sent'])
+    return counts
@@ -0,0 +1,97 @@
+"""
+Helpers for keyset (cursor) pagination.
+
+A cursor is the sort key of the last row on a page, JSON encoded and wrapped in
+url-safe base64 so clients treat it as an opaque token.
+"""
+import base64
+import json
+from datetime import datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+def _cursor_default(value):
+    # Full precision isoformat: DjangoJSONEncoder would drop the microseconds
+    # keyset comparisons on datetimes depend on
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(*values):
+    """Encode the sort key of the last row on a page into an opaque token."""
+    raw = json.dumps(list(values), default=_cursor_default, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, size):
+    """Decode a cursor into a list of ``size`` values; raises ValueError if invalid."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def parse_limit(value, default, maximum):
+    """Parse a page size query parameter; raises ValueError if invalid."""
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("limit must be a whole number")
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    return min(limit, maximum)
+
+
+def next_page_url(request, cursor):
+    """Absolute URL of the next page: the current query string with ``cursor`` replaced."""
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+
+
+def decode_date_id_cursor(token):
+    """Decode a ``(date, id)`` cursor as written by ``encode_cursor(obj.date, obj.id)``."""
+    date, pk = decode_cursor(token, 2)
+    date = parse_datetime(date) if isinstance(date, str) else None
+    if date is None or not isinstance(pk, int):
+        raise ValueError("Invalid cursor")
+    return date, pk
+
+
+def older_than(date, pk):
+    """Rows after ``(date, pk)`` in ``ORDER BY date DESC, id DESC`` order."""
+    return Q(date__lt=date) | Q(date=date, id__lt=pk)
+
+
+def parse_date_bound(value, name, end=False):
+    """
+    Parse a ``date_from``/``date_to`` style parameter into an aware datetime.
+
+    A plain date covers the whole day: as an ``end`` bound it becomes the
+    start of the following day, to be used with ``__lt``.
+    """
+    if value in (None, ''):
+        return None
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"{name} must be a date (YYYY-MM-DD) or datetime")
+        if end:
+            day += timedelta(days=1)
+        moment = datetime.combine(day, time.min)
+    elif end:
+        moment += timedelta(microseconds=1)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
@@ -0,0 +1,57 @@
+"""
+Streaming readers for the CSV and NDJSON files taken by the import commands.
+
+Records are yielded one at a time as dicts, so a file of any size is read in
+constant memory; ``chunked`` groups them for batched inserts.
+"""
+import csv
+import json
+from itertools import islice
+
+FORMATS = ('csv', 'ndjson')
+
+
+class RecordError(ValueError):
+    """A line that is not a valid record; ``line`` is its 1-based line number."""
+
+    def __init__(self, line, message):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+
+
+def guess_format(path):
+    """``'csv'`` or ``'ndjson'`` from a file name, or None."""
+    name = str(path).lower()
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    return None
+
+
+def read_records(lines, fmt):
+    """Yield ``(line_number, record)`` from an iterable of text lines."""
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, {key: value for key, value in record.items() if key is not None}
+    elif fmt == 'ndjson':
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise RecordError(number, f"invalid JSON ({e.msg})")
+            if not isinstance(record, dict):
+                raise RecordError(number, "expected a JSON object")
+            yield number, record
+    else:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+
+
+def chunked(iterable, size):
+    """Lists of up to ``size`` consecutive elements of ``iterable``."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
@@ -0,0 +1,103 @@
+"""
+Item search backed by the ``api_item_fts`` FTS5 index (migration 0009).
+
+The index covers item name and description, the item's category names and
+its vendor's name, and is kept in sync by triggers. Results are ranked with
+BM25, weighting name matches above category, vendor and description ones.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Item
+
+# bm25() column weights: name, description, categories, vendor
+BM25_WEIGHTS = (10.0, 2.0, 4.0, 3.0)
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def match_expression(text):
+    """
+    Turn free text into an FTS5 MATCH expression.
+
+    Every word must match, and the last one is treated as a prefix so results
+    show up while the user is still typing. Words are quoted, so FTS5 syntax
+    in user input is never interpreted.
+    """
+    tokens = TOKEN_RE.findall(text)
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _ranked_ids_fts(text, limit, offset):
+    expression = match_expression(text)
+    if expression is None:
+        return []
+    weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, bm25(api_item_fts, {weights}) AS score FROM api_item_fts "
+            "WHERE api_item_fts MATCH %s ORDER BY score LIMIT %s OFFSET %s",
+            [expression, limit, offset],
+        )
+        return cursor.fetchall()
+
+
+def _ranked_ids_fallback(text, limit, offset):
+    # Databases without FTS5: unranked substring matching, good enough for development
+    query = Q()
+    for token in TOKEN_RE.findall(text):
+        query &= (Q(name__icontains=token) | Q(description__icontains=token)
+                  | Q(categories__name__icontains=token) | Q(vendor__name__icontains=token))
+    if not query:
+        return []
+    ids = Item.objects.filter(query).order_by('id').values_list('id', flat=True).distinct()
+    return [(item_id, 0.0) for item_id in ids[offset:offset + limit]]
+
+
+def search_items(text, limit=20, offset=0):
+    """
+    Return ``(results, has_more)`` for a search, best match first.
+
+    Three queries: the ranked index lookup, the items with their vendor and
+    menu, and their categories.
+    """
+    if connection.vendor == 'sqlite':
+        ranked = _ranked_ids_fts(text, limit + 1, offset)
+    else:
+        ranked = _ranked_ids_fallback(text, limit + 1, offset)
+    has_more = len(ranked) > limit
+    ranked = ranked[:limit]
+    if not ranked:
+        return [], False
+
+    items = (Item.objects
+             .filter(id__in=[item_id for item_id, _ in ranked])
+             .select_related('vendor', 'menu')
+             .prefetch_related('categories'))
+    items = {item.id: item for item in items}
+
+    results = []
+    for item_id, score in ranked:
+        item = items.get(item_id)
+        if item is None:  # deleted between the two queries
+            continue
+        results.append({
+            "itemId": item.id,
+            "itemName": item.name,
+            "price": float(item.price),
+            "description": item.description or "",
+            "categories": [category.name for category in item.categories.all()],
+            "vendorId": item.vendor_id,
+            "vendorName": item.vendor.name,
+            "menuId": item.menu_id,
+            "menuName": item.menu.name,
+            # bm25() is lower-is-better; flip it so clients can sort descending
+            "score": round(-score, 4),
+        })
+    return results, has_more
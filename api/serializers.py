@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import Customer, Vendor
-from .models import Cart, CartItem, Item
+from .models import CartItem, Item
+from .roles import role_of
 
 class UserDetailSerializer(serializers.ModelSerializer):
     user_type = serializers.SerializerMethodField()
@@ -11,11 +12,7 @@ class UserDetailSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email', 'user_type']
     
     def get_user_type(self, obj):
-        if hasattr(obj, 'customer'):
-            return 'customer'
-        elif hasattr(obj, 'vendor'):
-            return 'vendor'
-        return None
+        return role_of(obj).user_type
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -103,10 +100,11 @@ class PasswordResetConfirmSerializer(serializers.Serializer):
 
 # Cart Serializers - Enhanced
 class CartItemSerializer(serializers.ModelSerializer):
-    item_name = serializers.CharField(source='item.name', read_only=True)
-    item_price = serializers.DecimalField(source='item.price', max_digits=10, decimal_places=2, read_only=True)
+    """Serializes lines from ``priced_cart_items``, which carry the item and vendor fields."""
+    item_name = serializers.CharField(read_only=True)
+    item_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
     subtotal = serializers.SerializerMethodField()
-    vendor_name = serializers.CharField(source='item.vendor.name', read_only=True)
+    vendor_name = serializers.CharField(read_only=True)
     
     class Meta:
         model = CartItem
@@ -114,23 +112,7 @@ class CartItemSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'item_name', 'item_price', 'subtotal', 'vendor_name']
     
     def get_subtotal(self, obj):
-        return float(obj.item.price * obj.quantity)
-
-class CartSerializer(serializers.ModelSerializer):
-    items = CartItemSerializer(many=True, read_only=True)
-    total_items = serializers.SerializerMethodField()
-    total_price = serializers.SerializerMethodField()
-    
-    class Meta:
-        model = Cart
-        fields = ['id', 'customer', 'items', 'total_items', 'total_price']
-        read_only_fields = ['id', 'customer', 'total_items', 'total_price']
-    
-    def get_total_items(self, obj):
-        return sum(item.quantity for item in obj.items.all())
-    
-    def get_total_price(self, obj):
-        return float(sum(item.item.price * item.quantity for item in obj.items.all()))
+        return float(obj.subtotal)
 
 # Additional serializer for item details when adding to cart
 class ItemSerializer(serializers.ModelSerializer):
@@ -0,0 +1,79 @@
+"""
+Signal handlers that keep the catalog change journal (``CatalogChange``) in
+step with writes to vendors, menus, items and categories, and that drop
+cached token authentications when tokens or their users change.
+
+Adding or removing a category on an item is journaled as a change to the
+item. Bulk writes (``bulk_create``, ``QuerySet.update``) bypass these signals
+and must call ``record_catalog_changes`` themselves.
+"""
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache
+from .models import CatalogChange, Customer, Vendor, Menu, Item, Category, ItemCategory
+
+KINDS = {Vendor: 'vendor', Menu: 'menu', Item: 'item', Category: 'category'}
+
+
+def _journal_entry(instance, deleted):
+    if isinstance(instance, ItemCategory):
+        return CatalogChange(kind='item', object_id=instance.item_id)
+    if isinstance(instance, Vendor):
+        vendor_id = instance.pk
+    else:
+        vendor_id = getattr(instance, 'vendor_id', None)
+    return CatalogChange(kind=KINDS[type(instance)], object_id=instance.pk,
+                         vendor_id=vendor_id, deleted=deleted)
+
+
+def record_catalog_changes(instances, deleted=False):
+    """Append journal entries for a batch of catalog rows in one INSERT."""
+    CatalogChange.objects.bulk_create([_journal_entry(instance, deleted) for instance in instances])
+
+
+@receiver(post_save, sender=Vendor)
+@receiver(post_save, sender=Menu)
+@receiver(post_save, sender=Item)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=ItemCategory)
+def journal_catalog_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    record_catalog_changes([instance])
+
+
+@receiver(post_delete, sender=Vendor)
+@receiver(post_delete, sender=Menu)
+@receiver(post_delete, sender=Item)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=ItemCategory)
+def journal_catalog_delete(sender, instance, **kwargs):
+    record_catalog_changes([instance], deleted=True)
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    token_cache.invalidate([instance.key])
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user_tokens(sender, instance, created=False, raw=False, **kwargs):
+    # Deactivation, password or profile changes must not be served from cache
+    if created or raw:
+        return
+    token_cache.invalidate(Token.objects.filter(user_id=instance.pk).values_list('key', flat=True))
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=Vendor)
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=Vendor)
+def invalidate_cached_role_tokens(sender, instance, raw=False, **kwargs):
+    # Cached users carry their customer/vendor row (see api/roles.py)
+    if raw or instance.user_id is None:
+        return
+    token_cache.invalidate(Token.objects.filter(user_id=instance.user_id).values_list('key', flat=True))
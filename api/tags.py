@@ -0,0 +1,132 @@
+"""
+In-memory inverted index from category tag to the items carrying it.
+
+Each tag maps to a sorted ``array('q')`` of item ids, so AND filters are
+intersections of sorted arrays (smallest first, bisecting into the larger
+ones) and OR filters are merges. Like the autocomplete index, it follows the
+catalog change journal and only re-reads the items that changed.
+"""
+import heapq
+import threading
+from array import array
+from bisect import bisect_left
+
+from .catalog import changes_since, current_catalog_version
+from .models import ItemCategory
+
+
+def _contains(ids, item_id):
+    i = bisect_left(ids, item_id)
+    return i < len(ids) and ids[i] == item_id
+
+
+def intersect(arrays):
+    """Sorted ids present in every array."""
+    if not arrays:
+        return []
+    arrays = sorted(arrays, key=len)
+    smallest, others = arrays[0], arrays[1:]
+    return [item_id for item_id in smallest if all(_contains(ids, item_id) for ids in others)]
+
+
+def union(arrays):
+    """Sorted ids present in any array."""
+    result = []
+    for item_id in heapq.merge(*arrays):
+        if not result or result[-1] != item_id:
+            result.append(item_id)
+    return result
+
+
+class TagIndex:
+    """tag name -> sorted item ids, kept current from the change journal."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._items = {}  # tag name -> array('q') of item ids
+        self._tags = {}  # item id -> tuple of tag names
+        self._version = None
+
+    def _link(self, item_id, names):
+        for name in names:
+            ids = self._items.setdefault(name, array('q'))
+            i = bisect_left(ids, item_id)
+            if i == len(ids) or ids[i] != item_id:
+                ids.insert(i, item_id)
+        if names:
+            self._tags[item_id] = tuple(names)
+
+    def _unlink(self, item_id):
+        for name in self._tags.pop(item_id, ()):
+            ids = self._items.get(name)
+            if ids is None:
+                continue
+            i = bisect_left(ids, item_id)
+            if i < len(ids) and ids[i] == item_id:
+                del ids[i]
+            if not ids:
+                del self._items[name]
+
+    def _rebuild(self):
+        version = current_catalog_version()
+        items, tags = {}, {}
+        for item_id, name in (ItemCategory.objects
+                              .order_by('item_id')
+                              .values_list('item_id', 'category__name')):
+            items.setdefault(name, array('q')).append(item_id)
+            tags.setdefault(item_id, []).append(name)
+        self._items = items
+        self._tags = {item_id: tuple(names) for item_id, names in tags.items()}
+        self._version = version
+
+    def refresh(self):
+        """Bring the index up to date; usually a single empty journal query."""
+        with self._lock:
+            if self._version is None:
+                self._rebuild()
+                return
+            version, changes = changes_since(self._version)
+            if not changes:
+                return
+            if any(kind == 'category' for kind, _ in changes):
+                # A tag was renamed or deleted: rare, rebuild from scratch
+                self._rebuild()
+                return
+
+            item_ids = {object_id for kind, object_id in changes if kind == 'item'}
+            current = {}
+            for item_id, name in (ItemCategory.objects
+                                  .filter(item_id__in=item_ids)
+                                  .order_by('id')
+                                  .values_list('item_id', 'category__name')):
+                current.setdefault(item_id, []).append(name)
+            for item_id in item_ids:
+                self._unlink(item_id)
+                self._link(item_id, current.get(item_id, []))
+            self._version = version
+
+    def item_ids(self, names, match_all=True):
+        """Sorted ids of items tagged with all (or any) of ``names``."""
+        self.refresh()
+        with self._lock:
+            arrays = [self._items.get(name, array('q')) for name in names]
+            return intersect(arrays) if match_all else union(arrays)
+
+    def facets(self, within=None):
+        """
+        Item count per tag, most used first. With ``within`` (sorted item ids)
+        only those items are counted.
+        """
+        self.refresh()
+        with self._lock:
+            if within is None:
+                counts = {name: len(ids) for name, ids in self._items.items()}
+            else:
+                counts = {}
+                for item_id in within:
+                    for name in self._tags.get(item_id, ()):
+                        counts[name] = counts.get(name, 0) + 1
+        return sorted(counts.items(), key=lambda entry: (-entry[1], entry[0]))
+
+
+tag_index = TagIndex()
@@ -1,3 +1,199 @@
-from django.test import TestCase
+import os
+import tempfile
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from .cart_store import cart_store
+from .models import Customer, Item, Menu, Order, StockReservation, Vendor
+
+CART_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'carts': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'cart-tests'},
+}
+
+
+def make_customer(name):
+    user = User.objects.create_user(name, f'{name}@example.com', 'password')
+    return Customer.objects.create(user=user, name=name, email=f'{name}@example.com')
+
+
+@override_settings(CACHES=CART_CACHES)
+class CartQueryCountTests(TestCase):
+    """Showing a cart costs the same number of queries however many lines it has."""
+
+    @classmethod
+    def setUpTestData(cls):
+        vendor = Vendor.objects.create(name='Vendor')
+        menu = Menu.objects.create(vendor=vendor, name='Menu')
+        cls.items = Item.objects.bulk_create([
+            Item(vendor=vendor, menu=menu, name=f'Item {i}', price=i) for i in range(1, 11)
+        ])
+        user = User.objects.create_user('customer', 'customer@example.com', 'password')
+        cls.customer = Customer.objects.create(user=user, name='Customer', email='customer@example.com')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer.user)
+
+    def fill_cart(self, count):
+        cart_store.clear(self.customer.id)
+        cart_store.apply(self.customer.id, [('add', item.id, 2) for item in self.items[:count]])
+        cart_store.flush(self.customer.id)
+
+    def assert_constant_queries(self, expected):
+        for count in (1, 10):
+            self.fill_cart(count)
+            self.client.get('/api/cart/')  # warm the cart store
+            with self.assertNumQueries(expected):
+                response = self.client.get('/api/cart/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['item_count'], count)
+            self.assertEqual(response.data['total_items'], 2 * count)
+            self.assertEqual(response.data['total_price'], float(sum(2 * i for i in range(1, count + 1))))
+
+    @override_settings(CART_STORE={'BACKEND': 'api.cart_store.DatabaseCartStore'})
+    def test_database_store(self):
+        # The cart, then its lines with items, vendors and totals in one query
+        self.assert_constant_queries(2)
+
+    @override_settings(CART_STORE={'BACKEND': 'api.cart_store.CacheCartStore',
+                                   'OPTIONS': {'cache': 'carts', 'write_behind': 60}})
+    def test_cache_store(self):
+        # Lines come from the cache; one query prices them
+        self.assert_constant_queries(1)
+
+
+@override_settings(CACHES=CART_CACHES, ASYNC_CHECKOUT=False)
+class IdempotentCheckoutTests(TestCase):
+    """A retried checkout with the same Idempotency-Key gets the first response back."""
+
+    @classmethod
+    def setUpTestData(cls):
+        vendor = Vendor.objects.create(name='Vendor')
+        menu = Menu.objects.create(vendor=vendor, name='Menu')
+        cls.item = Item.objects.create(vendor=vendor, menu=menu, name='Soup', price=4)
+        cls.customer = make_customer('customer')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer.user)
+        cart_store.forget(self.customer.id)
+        cart_store.add(self.customer.id, self.item.id, 2)
+
+    def checkout(self, key, path='/api/cart/checkout/', data=None):
+        return self.client.post(path, data or {}, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_response_and_headers(self):
+        first = self.checkout('key-1')
+        retry = self.checkout('key-1')
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry['Server-Timing'], first['Server-Timing'])
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.filter(customer=self.customer).count(), 1)
+
+    def test_retry_replays_location(self):
+        first = self.checkout('key-async', '/api/cart/checkout/?async=true')
+        retry = self.checkout('key-async', '/api/cart/checkout/?async=true')
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(retry['Location'], first['Location'])
+
+    def test_key_reused_for_another_request(self):
+        self.checkout('key-2')
+        response = self.checkout('key-2', data={'comment': 'different'})
+        self.assertEqual(response.status_code, 422)
+
+
+@override_settings(CACHES=CART_CACHES, ASYNC_CHECKOUT=False, STOCK_COUNTER_SHARDS=4)
+class DailyStockLimitTests(TestCase):
+    """Checkouts stop at an item's daily limit, and cancelling gives the units back."""
+
+    @classmethod
+    def setUpTestData(cls):
+        vendor = Vendor.objects.create(name='Vendor')
+        menu = Menu.objects.create(vendor=vendor, name='Menu')
+        cls.item = Item.objects.create(vendor=vendor, menu=menu, name='Cake', price=3, daily_stock_limit=3)
+        cls.first = make_customer('first')
+        cls.second = make_customer('second')
+
+    def checkout(self, customer, quantity):
+        client = APIClient()
+        client.force_authenticate(customer.user)
+        cart_store.forget(customer.id)
+        cart_store.clear(customer.id)
+        cart_store.add(customer.id, self.item.id, quantity)
+        return client, client.post('/api/cart/checkout/', {}, format='json')
+
+    def remaining(self, client):
+        return client.get('/api/customer/stock/', {'item': self.item.id}).data[0]['remaining']
+
+    def test_limit_and_release(self):
+        client, response = self.checkout(self.first, 2)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.remaining(client), 1)
+
+        _, response = self.checkout(self.second, 2)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual([item['item_id'] for item in response.data['items']], [self.item.id])
+        self.assertEqual(self.remaining(client), 1)
+
+        order_id = Order.objects.get(customer=self.first).id
+        response = client.post(f'/api/customer/orders/{order_id}/cancel/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.remaining(client), 3)
+        self.assertFalse(StockReservation.objects.filter(order_id=order_id).exists())
+
+        _, response = self.checkout(self.second, 3)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.remaining(client), 0)
+
+    def test_cancelled_order_cannot_be_cancelled_again(self):
+        client, _ = self.checkout(self.first, 1)
+        order_id = Order.objects.get(customer=self.first).id
+        client.post(f'/api/customer/orders/{order_id}/cancel/')
+        response = client.post(f'/api/customer/orders/{order_id}/cancel/')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.remaining(client), 3)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ImportUsersTests(TestCase):
+    """``import_users`` skips repeated and taken accounts, across chunk boundaries too."""
+
+    def run_import(self, rows, role='customer'):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'users.csv')
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                f.write('username,email,password,name\n')
+                f.writelines(f'{",".join(row)}\n' for row in rows)
+            stderr = StringIO()
+            call_command('import_users', path, role=role, chunk_size=1, workers=1,
+                         stdout=StringIO(), stderr=stderr)
+        return stderr.getvalue()
+
+    def test_email_repeated_across_chunks(self):
+        errors = self.run_import([
+            ('ann', 'same@example.com', 'pw', 'Ann'),
+            ('bob', 'same@example.com', 'pw', 'Bob'),
+            ('cat', 'cat@example.com', 'pw', 'Cat'),
+        ])
+        self.assertIn("line 3: customer email 'same@example.com' repeated", errors)
+        self.assertEqual(sorted(Customer.objects.values_list('user__username', flat=True)), ['ann', 'cat'])
+        self.assertTrue(User.objects.get(username='cat').check_password('pw'))
+
+    def test_existing_accounts_are_skipped(self):
+        make_customer('ann')
+        errors = self.run_import([
+            ('ann', 'new@example.com', 'pw', 'Ann'),
+            ('dan', 'ann@example.com', 'pw', 'Dan'),
+            ('dan', 'dan@example.com', 'pw', 'Dan'),
+        ])
+        self.assertIn("username 'ann' exists", errors)
+        self.assertIn("customer email 'ann@example.com' exists", errors)
+        self.assertIn("username 'dan' repeated", errors)
+        self.assertFalse(User.objects.filter(username='dan').exists())
@@ -1,6 +1,8 @@
 from django.urls import path
 from .views import (
     CustomerOrdersView,
+    CustomerOrderCancelView,
+    ItemStockView,
     RegisterView, 
     LoginView, 
     PasswordResetRequestView,
@@ -9,15 +11,25 @@ from .views import (
     CustomerRegistrationView,
     VendorRegistrationView,
     UserProfileView,
+    AuthCacheStatsView,
     VendorOrdersView,
+    VendorOrderStreamView,
     CustomerMenusView,
+    CatalogChangesView,
+    CategoryFacetsView,
+    ItemSearchView,
+    AutocompleteView,
     CartView,
+    CartBatchView,
     CartItemView,
     CartClearView,
     CheckoutView,
+    CheckoutJobView,
     VendorMenuView,
     VendorMenuDetailView,
-    VendorMenuItemView
+    VendorMenuItemView,
+    VendorMenuImportView,
+    VendorMenuExportView,
 )
 
 urlpatterns = [
@@ -30,6 +42,7 @@ urlpatterns = [
     # User info routes
     path('user/', UserDetailView.as_view(), name='user-detail'),
     path('profile/', UserProfileView.as_view(), name='user-profile'),
+    path('auth/cache-stats/', AuthCacheStatsView.as_view(), name='auth-cache-stats'),  # GET, staff only
     
     # User type specific registration
     path('register/customer/', CustomerRegistrationView.as_view(), name='register-customer'),
@@ -37,17 +50,28 @@ urlpatterns = [
     
     # Vendor and Customer specific routes
     path('vendor/orders/', VendorOrdersView.as_view(), name='vendor-orders'),
+    path('vendor/orders/stream/', VendorOrderStreamView.as_view(), name='vendor-orders-stream'),  # SSE, ASGI only
     path('customer/menus/', CustomerMenusView.as_view(), name='customer-menus'),
+    path('customer/menus/changes/', CatalogChangesView.as_view(), name='customer-menus-changes'),  # GET ?since=<version>
+    path('customer/menus/tags/', CategoryFacetsView.as_view(), name='customer-menus-tags'),  # GET: item count per tag
+    path('customer/search/', ItemSearchView.as_view(), name='customer-search'),  # GET ?q=<text>
+    path('customer/autocomplete/', AutocompleteView.as_view(), name='customer-autocomplete'),  # GET ?q=<prefix>
     
     # Cart routes
     path('cart/', CartView.as_view(), name='cart'),  # GET: display cart, POST: add item
+    path('cart/batch/', CartBatchView.as_view(), name='cart-batch'),  # POST: add/set/remove many lines at once
     path('cart/item/<int:item_id>/', CartItemView.as_view(), name='cart-item'),  # PUT: update quantity, DELETE: remove item
     path('cart/clear/', CartClearView.as_view(), name='cart-clear'),  # DELETE: clear entire cart
-    path('cart/checkout/', CheckoutView.as_view(), name='checkout'),  # POST: process checkout
+    path('cart/checkout/', CheckoutView.as_view(), name='checkout'),  # POST: process checkout (?async=true: queue it)
+    path('cart/checkout/jobs/<int:job_id>/', CheckoutJobView.as_view(), name='checkout-job'),  # GET: async checkout status
 
     path('customer/orders/', CustomerOrdersView.as_view(), name='customer-orders'),
+    path('customer/orders/<int:order_id>/cancel/', CustomerOrderCancelView.as_view(), name='customer-order-cancel'),  # POST
+    path('customer/stock/', ItemStockView.as_view(), name='customer-stock'),  # GET ?item=<ids>: units left today
 
      path('vendor/menus/', VendorMenuView.as_view(), name='vendor-menus'),  # GET: get all menus, POST: create menu
+    path('vendor/menus/import/', VendorMenuImportView.as_view(), name='vendor-menus-import'),  # POST a CSV/NDJSON body
+    path('vendor/menus/export/', VendorMenuExportView.as_view(), name='vendor-menus-export'),  # GET ?type=ndjson|csv, streamed
     path('vendor/menus/<int:menu_id>/', VendorMenuDetailView.as_view(), name='vendor-menu-detail'),  # GET, PUT, DELETE specific menu
 
     path('vendor/menus/<int:menu_id>/items/<int:item_id>/', VendorMenuItemView.as_view(), name='vendor-menu-item'),
@@ -1,19 +1,24 @@
 from rest_framework.generics import CreateAPIView, RetrieveAPIView
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
-from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
-from django.utils.encoding import force_bytes, force_str
-from django.core.mail import send_mail
-from .models import Order, Menu, Item, Contain, Vendor, Cart, CartItem , Category
-from django.db.models import Sum, F, Count
+from django.utils.http import urlsafe_base64_decode
+from django.utils.encoding import force_str
+from .models import Order, Menu, Item, Contain, Vendor, Cart, CartItem , ItemCategory, VendorOrder, CheckoutJob
+from django.db.models import Sum, Count, Q
 from django.db import transaction
-from rest_framework.decorators import api_view, permission_classes
+from django.conf import settings
+from django.urls import reverse
 from django.shortcuts import get_object_or_404
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework.authtoken.models import Token
+import json
+from django.utils.http import parse_etags
 
 from .serializers import (
     UserSerializer, 
@@ -24,12 +29,34 @@ from .serializers import (
     VendorRegistrationSerializer,
     CustomerSerializer,
     VendorSerializer,
-    CartSerializer,
     CartItemSerializer,
-    # MenuSerializer,
-    ItemSerializer,
 )
-from .models import Customer, Vendor
+from .catalog import (
+    catalog, catalog_etag, filter_vendor_tree, touch_vendor, build_vendor_trees, get_catalog_file,
+    catalog_changes, current_catalog_version, CatalogHistoryExpired,
+    clean_category_names, create_menu_items,
+)
+from .authentication import token_cache
+from .roles import get_role
+from .cart_store import CART_OPERATIONS, cart_store
+from .checkout_jobs import enqueue_checkout, job_status
+from .idempotency import idempotent
+from .inventory import OutOfStockError, stock_levels
+from .menu_io import (
+    CONTENT_TYPES, export_menu_rows, import_menu_rows, iterate_in_thread, parse_daily_limit, render_rows,
+)
+from .records import read_records
+from .outbox import queue_password_reset
+from .orders import (
+    EmptyCartError, OrderNotCancellableError, StageTimer, cancel_order, place_order,
+)
+from .events import broker, vendor_channel
+from .search import search_items
+from .autocomplete import autocomplete_index
+from .tags import tag_index
+from .pagination import (
+    encode_cursor, decode_cursor, decode_date_id_cursor, older_than, parse_date_bound, parse_limit, next_page_url,
+)
 
 class UserDetailView(RetrieveAPIView):
     serializer_class = UserDetailSerializer
@@ -65,24 +92,10 @@ class PasswordResetRequestView(APIView):
     def post(self, request):
         serializer = PasswordResetRequestSerializer(data=request.data)
         if serializer.is_valid():
-            email = serializer.validated_data['email']
-            User = get_user_model()
-            try:
-                user = User.objects.get(email=email)
-                token = default_token_generator.make_token(user)
-                uid = urlsafe_base64_encode(force_bytes(user.pk))
-                reset_link = f"http://example.com/reset-password/{uid}/{token}/"
-                send_mail(
-                    'Password Reset Request',
-                    f'Click the link to reset your password: {reset_link}',
-                    'from@example.com',
-                    [email],
-                    fail_silently=False,
-                )
-                return Response({'message': 'Password reset email sent.'}, status=status.HTTP_200_OK)
-            except User.DoesNotExist:
-                # Return the same message to avoid revealing user existence
-                return Response({'message': 'Password reset email sent.'}, status=status.HTTP_200_OK)
+            # The send_outbox worker looks the address up and mails the link,
+            # so known and unknown addresses take the same time and answer
+            queue_password_reset(serializer.validated_data['email'])
+            return Response({'message': 'Password reset email sent.'}, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
 class LoginView(ObtainAuthToken):
@@ -120,183 +133,434 @@ class UserProfileView(APIView):
         }
         
         # Check user type and add specific profile data
-        if hasattr(user, 'customer'):
-            data['user_type'] = 'customer'
-            customer_data = CustomerSerializer(user.customer).data
+        role = get_role(request)
+        data['user_type'] = role.user_type
+        if role.customer:
+            customer_data = CustomerSerializer(role.customer).data
             data.update(customer_data)
-        elif hasattr(user, 'vendor'):
-            data['user_type'] = 'vendor'
-            vendor_data = VendorSerializer(user.vendor).data
+        elif role.vendor:
+            vendor_data = VendorSerializer(role.vendor).data
             data.update(vendor_data)
-        else:
-            data['user_type'] = None
         
         return Response(data)
 
 class VendorOrdersView(APIView):
     """
     Endpoint to get orders for a vendor
+
+    Query parameters (all optional):
+        status                comma-separated order statuses
+        date_from, date_to    date or datetime bounds (inclusive)
+        limit, cursor         keyset pagination, newest first; the next
+                              page's URL is sent in the ``Link`` header
+
+    Two queries per page however many orders or lines there are: the
+    vendor's sub-orders (written at checkout) with order and customer, and
+    the vendor's line items for those orders, which carry the price and
+    names they were sold at.
     """
     permission_classes = [IsAuthenticated]
+    max_page_size = 200
     
     def get(self, request):
         # Check if user is a vendor
-        if not hasattr(request.user, 'vendor'):
+        if not get_role(request).is_vendor:
             return Response(
                 {"error": "Only vendors can access this endpoint"}, 
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        vendor = request.user.vendor
+        vendor = get_role(request).vendor
         
-        # Get all orders that contain items from this vendor
-        orders_data = []
+        params = request.query_params
+        try:
+            statuses = [value for value in params.get('status', '').split(',') if value]
+            date_from = parse_date_bound(params.get('date_from'), 'date_from')
+            date_to = parse_date_bound(params.get('date_to'), 'date_to', end=True)
+            limit = parse_limit(params.get('limit'), None, self.max_page_size)
+            cursor = params.get('cursor')
+            after = decode_date_id_cursor(cursor) if cursor else None
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Find all items that belong to this vendor
-        vendor_items = Item.objects.filter(vendor=vendor).values_list('id', flat=True)
+        # The vendor's sub-orders: one indexed range scan on (vendor, date)
+        vendor_orders = (VendorOrder.objects
+                         .filter(vendor=vendor)
+                         .select_related('order__customer')
+                         .order_by('-date', '-id'))
         
-        # Find all order-item relationships that contain these items
-        order_items = Contain.objects.filter(item_id__in=vendor_items)
+        if statuses:
+            # Orders without a status are reported as "Pending"
+            status_filter = Q(status__in=statuses)
+            if 'Pending' in statuses:
+                status_filter |= Q(status='')
+            vendor_orders = vendor_orders.filter(status_filter)
+        if date_from is not None:
+            vendor_orders = vendor_orders.filter(date__gte=date_from)
+        if date_to is not None:
+            vendor_orders = vendor_orders.filter(date__lt=date_to)
+        if after is not None:
+            vendor_orders = vendor_orders.filter(older_than(*after))
         
-        # Group by order to avoid duplicates
-        processed_orders = set()
+        vendor_orders = list(vendor_orders[:limit + 1] if limit is not None else vendor_orders)
+        has_more = limit is not None and len(vendor_orders) > limit
+        vendor_orders = vendor_orders[:limit]
         
-        for order_item in order_items:
-            order = order_item.order
-            
-            # Skip if we've already processed this order
-            if order.id in processed_orders:
-                continue
-                
-            processed_orders.add(order.id)
-            
-            # Get all items in this order that belong to this vendor
-            order_contains = Contain.objects.filter(
-                order=order,
-                item__vendor=vendor
-            ).select_related('item')
-            
-            # Calculate total for this vendor's items in the order
-            vendor_total = sum(oc.item.price * oc.quantity for oc in order_contains)
-            
-            # Get item details
-            items_details = []
-            for oc in order_contains:
-                items_details.append({
-                    "itemName": oc.item.name,
-                    "quantity": oc.quantity,
-                    "price": float(oc.item.price),
-                    "subtotal": float(oc.item.price * oc.quantity)
-                })
-            
+        # All of the vendor's line items for this page in one query
+        lines = {}
+        for oc in (Contain.objects
+                   .filter(vendor=vendor, order_id__in=[vendor_order.order_id for vendor_order in vendor_orders])
+                   .order_by('id')):
+            lines.setdefault(oc.order_id, []).append({
+                "itemName": oc.item_name,
+                "quantity": oc.quantity,
+                "price": float(oc.unit_price),
+                "subtotal": float(oc.unit_price * oc.quantity)
+            })
+        
+        orders_data = []
+        for vendor_order in vendor_orders:
+            order = vendor_order.order
             # Build order data with comment
-            order_data = {
+            orders_data.append({
                 "orderId": order.id,
                 "orderDate": order.date,
                 "customerName": order.customer.name,
                 "customerEmail": order.customer.email,
                 "customerPhone": order.customer.phone,
                 "comment": order.comment or "",  # NEW: Include customer comment for vendor
-                "items": items_details,
-                "totalOrderPrice": float(vendor_total),
-                "status": order.status or "Pending"
-            }
-            
-            orders_data.append(order_data)
+                "items": lines.get(order.id, []),
+                "totalOrderPrice": float(vendor_order.subtotal),
+                "itemCount": vendor_order.item_count,
+                "status": vendor_order.status or "Pending"
+            })
         
-        return Response(orders_data)
+        response = Response(orders_data)
+        if has_more:
+            last = vendor_orders[-1]
+            response['Link'] = f'<{next_page_url(request, encode_cursor(last.date, last.id))}>; rel="next"'
+        return response
+
+def _parse_id_list(value):
+    """Parse a comma-separated id filter such as ``?vendor=1,2``; None if absent."""
+    if not value:
+        return None
+    try:
+        return {int(part) for part in value.split(',') if part.strip()}
+    except ValueError:
+        raise ValueError(f"Invalid id list: {value}")
+
+
+def _parse_price(value, name):
+    """Parse an optional price filter such as ``?min_price=4.5``."""
+    if value in (None, ''):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a valid number")
+
+
+def _parse_tag_filter(params):
+    """Parse ``?tags=vegan,spicy&tag_match=all|any`` into (names or None, match_all)."""
+    tags = [name.strip() for name in params.get('tags', '').split(',') if name.strip()] or None
+    tag_match = params.get('tag_match', 'all')
+    if tag_match not in ('all', 'any'):
+        raise ValueError("tag_match must be 'all' or 'any'")
+    return tags, tag_match == 'all'
+
 
 class CustomerMenusView(APIView):
     """
     Endpoint to get all menus with items for a customer
+
+    Query parameters (all optional):
+        vendor, menu          comma-separated ids to restrict the catalog to
+        min_price, max_price  only keep items in this price range
+        tags                  comma-separated category tags; items must carry
+                              all of them (or any, with tag_match=any)
+        limit, cursor         keyset pagination over vendors; the next page's
+                              URL is sent in the ``Link`` header
+
+    Every response carries a strong ``ETag`` derived from the catalog versions,
+    so clients can revalidate with ``If-None-Match`` and get a 304, and an
+    ``X-Catalog-Version`` header to pass to the changes endpoint later.
     """
     permission_classes = [IsAuthenticated]
+    max_page_size = 100
     
     def get(self, request):
         # Check if user is a customer
-        if not hasattr(request.user, 'customer'):
+        if not get_role(request).is_customer:
             return Response(
                 {"error": "Only customers can access this endpoint"}, 
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Get all menus with their items
-        all_vendors = Vendor.objects.all()
-        result = []
+        params = request.query_params
+        try:
+            vendor_ids = _parse_id_list(params.get('vendor'))
+            tags, match_all = _parse_tag_filter(params)
+            menu_ids = _parse_id_list(params.get('menu'))
+            min_price = _parse_price(params.get('min_price'), 'min_price')
+            max_price = _parse_price(params.get('max_price'), 'max_price')
+            limit = parse_limit(params.get('limit'), None, self.max_page_size)
+            cursor = params.get('cursor')
+            after = int(decode_cursor(cursor, 1)[0]) if cursor else None
+        except (TypeError, ValueError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        for vendor in all_vendors:
-            vendor_data = {
-                "vendorId": vendor.id,
-                "vendorName": vendor.name,
-                "location": vendor.location,
-                "workingHours": vendor.working_hours,
-                "menus": []
-            }
-            
-            # Get all menus for this vendor
-            menus = Menu.objects.filter(vendor=vendor)
-            
-            for menu in menus:
-                menu_data = {
-                    "menuId": menu.id,
-                    "menuName": menu.name,
-                    "date": menu.date,
-                    "items": []
-                }
-                
-                # Get all items for this menu
-                items = Item.objects.filter(menu=menu)
-                
-                for item in items:
-                    # Get categories for this item
-                    categories = list(item.categories.values_list('name', flat=True))
-                    
-                    item_data = {
-                        "itemId": item.id,
-                        "itemName": item.name,
-                        "price": float(item.price),
-                        "description": item.description or "",
-                        "categories": categories
-                    }
-                    
-                    menu_data["items"].append(item_data)
-                
-                vendor_data["menus"].append(menu_data)
-            
-            result.append(vendor_data)
+        # Journal version first: the payload below is at least this new, so a
+        # delta sync from it never misses a change
+        catalog_version = current_catalog_version()
+        
+        # One query for the vendor versions; everything below is decided from them
+        versions = catalog.versions()
+        candidates = {
+            vendor_id: version for vendor_id, version in versions.items()
+            if (vendor_ids is None or vendor_id in vendor_ids)
+            and (after is None or vendor_id > after)
+        }
+        
+        etag = catalog_etag(candidates, sorted(menu_ids or ()), min_price, max_price, tags, match_all, limit)
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED,
+                            headers={'ETag': etag, 'X-Catalog-Version': str(catalog_version)})
+        
+        filtering = (menu_ids is not None or min_price is not None or max_price is not None
+                     or tags is not None)
+        item_ids = set(tag_index.item_ids(tags, match_all)) if tags is not None else None
+        catalog_file = get_catalog_file()
+        
+        if not filtering:
+            page_ids = list(candidates)[:limit]
+            has_more = len(candidates) > len(page_ids)
+            if catalog_file is not None:
+                # Pre-serialized segments shared by all workers; the whole
+                # catalog is a single slice of the file
+                body = catalog_file.render(
+                    versions, None if len(page_ids) == len(versions) else page_ids
+                )
+                response = HttpResponse(body, content_type='application/json')
+            else:
+                # Served from the versioned snapshot; only changed vendors are rebuilt
+                response = Response(catalog.vendors({vendor_id: candidates[vendor_id]
+                                                     for vendor_id in page_ids}))
+        else:
+            page = []
+            for tree in catalog.vendors(candidates):
+                tree = filter_vendor_tree(tree, menu_ids, min_price, max_price, item_ids)
+                if tree is not None:
+                    page.append(tree)
+            has_more = limit is not None and len(page) > limit
+            page_ids = [tree["vendorId"] for tree in page[:limit]]
+            response = Response(page[:limit])
+        
+        response['ETag'] = etag
+        response['X-Catalog-Version'] = str(catalog_version)
+        if has_more and page_ids:
+            response['Link'] = f'<{next_page_url(request, encode_cursor(page_ids[-1]))}>; rel="next"'
+        return response
+
+class CategoryFacetsView(APIView):
+    """
+    Endpoint to get the number of items per category tag
+
+    With ``tags`` (and optionally ``tag_match=any``) only the items matching
+    that filter are counted, so clients can show how a further tag would
+    narrow the current selection.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        # Check if user is a customer
+        if not get_role(request).is_customer:
+            return Response(
+                {"error": "Only customers can access this endpoint"}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        try:
+            tags, match_all = _parse_tag_filter(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        within = tag_index.item_ids(tags, match_all) if tags is not None else None
+        facets = tag_index.facets(within)
         
-        return Response(result)
+        return Response({
+            "tags": [{"name": name, "itemCount": count} for name, count in facets],
+            "matchingItems": len(within) if within is not None else None
+        })
+
+class CatalogChangesView(APIView):
+    """
+    Endpoint to get catalog changes since a version (delta sync)
+
+    Clients pass the ``X-Catalog-Version`` of their last full load (or the
+    ``version`` of their last delta) as ``since`` and get back upserted rows
+    and deleted ids per kind. While ``hasMore`` is true they should call again
+    with the returned ``version``. A 410 means the history was pruned and the
+    full catalog has to be reloaded.
+    """
+    permission_classes = [IsAuthenticated]
+    max_page_size = 1000
+    
+    def get(self, request):
+        # Check if user is a customer
+        if not get_role(request).is_customer:
+            return Response(
+                {"error": "Only customers can access this endpoint"}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        try:
+            since = int(request.query_params.get('since', ''))
+            if since < 0:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {"error": "since must be a non-negative catalog version"}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            limit = parse_limit(request.query_params.get('limit'), self.max_page_size, self.max_page_size)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            return Response(catalog_changes(since, limit))
+        except CatalogHistoryExpired:
+            return Response(
+                {
+                    "error": "Changes since this version are no longer available",
+                    "version": current_catalog_version()
+                }, 
+                status=status.HTTP_410_GONE
+            )
+
+class ItemSearchView(APIView):
+    """
+    Endpoint to search items by name, description, category and vendor
+
+    Query parameters: q (required), limit, offset. Results are ranked best
+    match first; ``next`` holds the URL of the following page, if any.
+    """
+    permission_classes = [IsAuthenticated]
+    default_page_size = 20
+    max_page_size = 50
+    
+    def get(self, request):
+        # Check if user is a customer
+        if not get_role(request).is_customer:
+            return Response(
+                {"error": "Only customers can access this endpoint"}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"error": "Search query (q) is required"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            limit = parse_limit(request.query_params.get('limit'), self.default_page_size, self.max_page_size)
+            offset = int(request.query_params.get('offset') or 0)
+            if offset < 0:
+                raise ValueError("offset cannot be negative")
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        results, has_more = search_items(query, limit, offset)
+        
+        next_url = None
+        if has_more:
+            params = request.query_params.copy()
+            params['offset'] = offset + limit
+            next_url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+        
+        return Response({
+            "query": query,
+            "results": results,
+            "next": next_url
+        })
+
+class AutocompleteView(APIView):
+    """
+    Endpoint for search-box suggestions
+
+    Query parameters: q (the text typed so far), limit, and type to restrict
+    suggestions to item, vendor and/or category (comma-separated). The most
+    popular matches come first.
+    """
+    permission_classes = [IsAuthenticated]
+    default_page_size = 10
+    max_page_size = 25
+    suggestion_types = ('item', 'vendor', 'category')
+    
+    def get(self, request):
+        # Check if user is a customer
+        if not get_role(request).is_customer:
+            return Response(
+                {"error": "Only customers can access this endpoint"}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        prefix = request.query_params.get('q', '')
+        kinds = tuple(kind for kind in request.query_params.get('type', '').split(',') if kind) \
+            or self.suggestion_types
+        if any(kind not in self.suggestion_types for kind in kinds):
+            return Response(
+                {"error": f"type must be one of: {', '.join(self.suggestion_types)}"}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            limit = parse_limit(request.query_params.get('limit'), self.default_page_size, self.max_page_size)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            "query": prefix,
+            "suggestions": autocomplete_index.suggest(prefix, limit, kinds)
+        })
 
 # Cart functionality - Fixed and completed
+def cart_contents(customer):
+    """The customer's cart as returned by ``cart/`` GET, priced at current prices"""
+    cart = cart_store.priced(customer.id)
+    return {
+        'id': cart.cart_id,
+        'customer': customer.id,
+        'items': CartItemSerializer(cart.lines, many=True).data,
+        'total_items': cart.total_items,
+        'total_price': float(cart.total_price),
+        'total': float(cart.total_price),
+        'item_count': len(cart.lines)
+    }
+
+
 class CartView(APIView):
     """
     Handle cart operations: GET (display), POST (add items)
+
+    Carts are kept in the configured cart store (see api/cart_store.py) and
+    written to the database behind the requests that change them.
     """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         """Display cart contents"""
-        customer = getattr(request.user, 'customer', None)
+        customer = get_role(request).customer
         if not customer:
             return Response({'error': 'Only customers have carts.'}, status=status.HTTP_403_FORBIDDEN)
 
-        cart, created = Cart.objects.get_or_create(customer=customer)
-        
-        # Calculate cart total
-        cart_items = cart.items.all()
-        total = sum(item.item.price * item.quantity for item in cart_items)
-        
-        # Serialize cart data
-        serializer = CartSerializer(cart)
-        response_data = serializer.data
-        response_data['total'] = float(total)
-        response_data['item_count'] = cart_items.count()
-        
-        return Response(response_data)
+        return Response(cart_contents(customer))
 
+    @idempotent
     def post(self, request):
         """Add item to cart"""
-        customer = getattr(request.user, 'customer', None)
+        customer = get_role(request).customer
         if not customer:
             return Response({'error': 'Only customers can add to cart.'}, status=status.HTTP_403_FORBIDDEN)
 
@@ -315,27 +579,77 @@ class CartView(APIView):
             return Response({'error': 'Item ID is required.'}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            item = Item.objects.get(id=item_id)
-        except Item.DoesNotExist:
+            item = Item.objects.only('id', 'name').get(id=item_id)
+        except (Item.DoesNotExist, ValueError):
             return Response({'error': 'Item not found.'}, status=status.HTTP_404_NOT_FOUND)
 
-        cart, _ = Cart.objects.get_or_create(customer=customer)
-        cart_item, created = CartItem.objects.get_or_create(cart=cart, item=item)
-
-        if not created:
-            cart_item.quantity += quantity
-        else:
-            cart_item.quantity = quantity
-
-        cart_item.save()
+        quantity_in_cart = cart_store.add(customer.id, item.id, quantity)
 
         return Response({
             'message': f"{item.name} added to cart.",
             'item_name': item.name,
-            'quantity_in_cart': cart_item.quantity
+            'quantity_in_cart': quantity_in_cart
         }, status=status.HTTP_200_OK)
 
 
+class CartBatchView(APIView):
+    """
+    Apply a list of cart operations in one transaction and return the cart
+
+    Body: ``{"operations": [{"op": "add" | "set" | "remove", "item_id": 1,
+    "quantity": 2}, ...]}``. Operations run in order; ``add`` adds to the
+    quantity in the cart, ``set`` replaces it, and ``remove`` drops the line
+    (removing an item that is not in the cart is not an error). Every item
+    is looked up in one query, and nothing is applied if any operation is
+    invalid.
+    """
+    permission_classes = [IsAuthenticated]
+    max_operations = 200
+
+    @idempotent
+    def post(self, request):
+        customer = get_role(request).customer
+        if not customer:
+            return Response({'error': 'Only customers can modify cart.'}, status=status.HTTP_403_FORBIDDEN)
+
+        raw_operations = request.data.get('operations')
+        if not isinstance(raw_operations, list) or not raw_operations:
+            return Response({'error': 'operations must be a non-empty list.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(raw_operations) > self.max_operations:
+            return Response({'error': f'At most {self.max_operations} operations per request.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        operations = []
+        for i, operation in enumerate(raw_operations, start=1):
+            if not isinstance(operation, dict) or operation.get('op') not in CART_OPERATIONS:
+                return Response({'error': f"Operation {i}: op must be one of {', '.join(CART_OPERATIONS)}."},
+                                status=status.HTTP_400_BAD_REQUEST)
+            try:
+                item_id = int(operation.get('item_id'))
+            except (TypeError, ValueError):
+                return Response({'error': f'Operation {i}: item_id is required.'}, status=status.HTTP_400_BAD_REQUEST)
+            quantity = None
+            if operation['op'] != 'remove':
+                try:
+                    quantity = int(operation.get('quantity', 1))
+                except (TypeError, ValueError):
+                    return Response({'error': f'Operation {i}: invalid quantity.'}, status=status.HTTP_400_BAD_REQUEST)
+                if quantity < 1:
+                    return Response({'error': f'Operation {i}: quantity must be at least 1.'},
+                                    status=status.HTTP_400_BAD_REQUEST)
+            operations.append((operation['op'], item_id, quantity))
+
+        # One lookup for every item being added or set
+        wanted = {item_id for op, item_id, _ in operations if op != 'remove'}
+        missing = wanted - set(Item.objects.filter(id__in=wanted).values_list('id', flat=True))
+        if missing:
+            return Response({'error': 'Item not found.', 'item_ids': sorted(missing)},
+                            status=status.HTTP_404_NOT_FOUND)
+
+        cart_store.apply(customer.id, operations)
+        return Response(cart_contents(customer), status=status.HTTP_200_OK)
+
+
 class CartItemView(APIView):
     """
     Handle individual cart item operations: PUT (update), DELETE (remove)
@@ -344,7 +658,7 @@ class CartItemView(APIView):
 
     def put(self, request, item_id):
         """Update quantity of item in cart"""
-        customer = getattr(request.user, 'customer', None)
+        customer = get_role(request).customer
         if not customer:
             return Response({'error': 'Only customers can modify cart.'}, status=status.HTTP_403_FORBIDDEN)
 
@@ -359,44 +673,32 @@ class CartItemView(APIView):
             return Response({'error': 'Invalid quantity.'}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            cart = Cart.objects.get(customer=customer)
-            cart_item = CartItem.objects.get(cart=cart, item_id=item_id)
-            
-            cart_item.quantity = quantity
-            cart_item.save()
-            
-            return Response({
-                'message': f"Updated {cart_item.item.name} quantity to {quantity}.",
-                'item_name': cart_item.item.name,
-                'new_quantity': quantity
-            }, status=status.HTTP_200_OK)
-            
-        except Cart.DoesNotExist:
-            return Response({'error': 'Cart not found.'}, status=status.HTTP_404_NOT_FOUND)
-        except CartItem.DoesNotExist:
+            cart_store.update(customer.id, item_id, quantity)
+        except KeyError:
             return Response({'error': 'Item not found in cart.'}, status=status.HTTP_404_NOT_FOUND)
+        
+        item_name = Item.objects.filter(id=item_id).values_list('name', flat=True).first()
+        return Response({
+            'message': f"Updated {item_name} quantity to {quantity}.",
+            'item_name': item_name,
+            'new_quantity': quantity
+        }, status=status.HTTP_200_OK)
 
     def delete(self, request, item_id):
         """Remove item from cart"""
-        customer = getattr(request.user, 'customer', None)
+        customer = get_role(request).customer
         if not customer:
             return Response({'error': 'Only customers can modify cart.'}, status=status.HTTP_403_FORBIDDEN)
 
         try:
-            cart = Cart.objects.get(customer=customer)
-            cart_item = CartItem.objects.get(cart=cart, item_id=item_id)
-            
-            item_name = cart_item.item.name
-            cart_item.delete()
-            
-            return Response({
-                'message': f"{item_name} removed from cart."
-            }, status=status.HTTP_200_OK)
-            
-        except Cart.DoesNotExist:
-            return Response({'error': 'Cart not found.'}, status=status.HTTP_404_NOT_FOUND)
-        except CartItem.DoesNotExist:
+            cart_store.remove(customer.id, item_id)
+        except KeyError:
             return Response({'error': 'Item not found in cart.'}, status=status.HTTP_404_NOT_FOUND)
+        
+        item_name = Item.objects.filter(id=item_id).values_list('name', flat=True).first()
+        return Response({
+            'message': f"{item_name} removed from cart."
+        }, status=status.HTTP_200_OK)
 
 
 class CartClearView(APIView):
@@ -407,34 +709,40 @@ class CartClearView(APIView):
 
     def delete(self, request):
         """Clear entire cart"""
-        customer = getattr(request.user, 'customer', None)
+        customer = get_role(request).customer
         if not customer:
             return Response({'error': 'Only customers can clear cart.'}, status=status.HTTP_403_FORBIDDEN)
 
-        try:
-            cart = Cart.objects.get(customer=customer)
-            items_count = cart.items.count()
-            cart.items.all().delete()
-            
-            return Response({
-                'message': f"Cart cleared. {items_count} items removed."
-            }, status=status.HTTP_200_OK)
-            
-        except Cart.DoesNotExist:
+        items_count = cart_store.clear(customer.id)
+        if not items_count:
             return Response({
                 'message': 'Cart is already empty.'
             }, status=status.HTTP_200_OK)
+        
+        return Response({
+            'message': f"Cart cleared. {items_count} items removed."
+        }, status=status.HTTP_200_OK)
 
 
 class CheckoutView(APIView):
     """
     Handle cart checkout - convert cart items to order
+
+    The whole checkout is one transaction with the cart locked (see
+    ``orders.place_order``); the time spent in each stage is returned in
+    the ``Server-Timing`` header. Retries carrying the same
+    ``Idempotency-Key`` get the first response back (see api/idempotency.py).
+
+    With ``?async=true`` (or ``settings.ASYNC_CHECKOUT``) the checkout is
+    queued instead and answered with ``202`` and the URL of its status
+    (``CheckoutJobView``); the ``process_checkouts`` command places the order.
     """
     permission_classes = [IsAuthenticated]
 
+    @idempotent
     def post(self, request):
         """Process checkout and create order with optional comment"""
-        customer = getattr(request.user, 'customer', None)
+        customer = get_role(request).customer
         if not customer:
             return Response({'error': 'Only customers can checkout.'}, status=status.HTTP_403_FORBIDDEN)
 
@@ -443,136 +751,178 @@ class CheckoutView(APIView):
         comment = request.data.get('comment', '').strip()  # NEW: Get comment from request
         
         try:
-            cart = Cart.objects.get(customer=customer)
-            cart_items = cart.items.all()
-            
-            # Check if cart is empty
-            if not cart_items.exists():
-                return Response({'error': 'Cart is empty. Cannot checkout.'}, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Calculate total amount
-            total_amount = sum(item.item.price * item.quantity for item in cart_items)
-            
-            # Create the order with comment
-            order = Order.objects.create(
-                customer=customer,
-                total_amount=total_amount,
-                status='Pending',
-                payment_method=payment_method,
-                comment=comment if comment else None  # NEW: Add comment to order
-            )
-            
-            # Create order items (Contain relationships)
-            order_items_created = []
-            for cart_item in cart_items:
-                contain = Contain.objects.create(
-                    order=order,
-                    item=cart_item.item,
-                    quantity=cart_item.quantity
-                )
-                order_items_created.append({
-                    'item_name': cart_item.item.name,
-                    'quantity': cart_item.quantity,
-                    'price': float(cart_item.item.price),
-                    'subtotal': float(cart_item.item.price * cart_item.quantity),
-                    'vendor': cart_item.item.vendor.name
-                })
-            
-            # Clear the cart after successful checkout
-            cart.items.all().delete()
-            
-            # Prepare response data
-            response_data = {
-                'message': 'Checkout successful!',
-                'order': {
-                    'order_id': order.id,
-                    'customer_name': customer.name,
-                    'order_date': order.date,
-                    'total_amount': float(order.total_amount),
-                    'status': order.status,
-                    'payment_method': order.payment_method,
-                    'comment': order.comment,  # NEW: Include comment in response
-                    'items': order_items_created,
-                    'item_count': len(order_items_created)
-                }
-            }
-            
-            return Response(response_data, status=status.HTTP_201_CREATED)
-            
+            async_mode = _parse_bool(request.query_params.get('async'), 'async', settings.ASYNC_CHECKOUT)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if async_mode:
+            return self.enqueue(request, customer, payment_method, comment)
+        
+        timer = StageTimer()
+        try:
+            # Write the cart behind now so the order is built from what the customer sees
+            cart_store.flush(customer.id)
+            timer.mark('flush')
+            order, cart_items = place_order(customer, payment_method, comment, timer)
+            cart_store.forget(customer.id)
         except Cart.DoesNotExist:
             return Response({'error': 'Cart not found or is empty.'}, status=status.HTTP_404_NOT_FOUND)
+        except EmptyCartError:
+            return Response({'error': 'Cart is empty. Cannot checkout.'}, status=status.HTTP_400_BAD_REQUEST)
+        except OutOfStockError as e:
+            return Response({
+                'error': str(e),
+                'items': [{'item_id': item.id, 'item_name': item.name} for item in e.items]
+            }, status=status.HTTP_409_CONFLICT)
         except Exception as e:
             return Response({
                 'error': 'Checkout failed. Please try again.',
                 'details': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
+        order_items_created = [{
+            'item_name': cart_item.item.name,
+            'quantity': cart_item.quantity,
+            'price': float(cart_item.item.price),
+            'subtotal': float(cart_item.item.price * cart_item.quantity),
+            'vendor': cart_item.item.vendor.name
+        } for cart_item in cart_items]
+        
+        # Prepare response data
+        response_data = {
+            'message': 'Checkout successful!',
+            'order': {
+                'order_id': order.id,
+                'customer_name': customer.name,
+                'order_date': order.date,
+                'total_amount': float(order.total_amount),
+                'status': order.status,
+                'payment_method': order.payment_method,
+                'comment': order.comment,  # NEW: Include comment in response
+                'items': order_items_created,
+                'item_count': len(order_items_created)
+            }
+        }
+        
+        response = Response(response_data, status=status.HTTP_201_CREATED)
+        response['Server-Timing'] = timer.header()
+        return response
+    
+    def enqueue(self, request, customer, payment_method, comment):
+        """Queue the checkout for the worker and hand back where to poll for it"""
+        cart_store.flush(customer.id)
+        if not CartItem.objects.filter(cart__customer=customer).exists():
+            return Response({'error': 'Cart is empty. Cannot checkout.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        job = enqueue_checkout(customer, payment_method, comment)
+        status_url = request.build_absolute_uri(reverse('checkout-job', args=[job.id]))
+        
+        response = Response({
+            'message': 'Checkout queued.',
+            'job': {
+                'job_id': job.id,
+                'status': job.status,
+                'status_url': status_url
+            }
+        }, status=status.HTTP_202_ACCEPTED)
+        response['Location'] = status_url
+        return response
+
+
+class CheckoutJobView(APIView):
+    """
+    Status of an asynchronous checkout; includes the order once it is placed
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        customer = get_role(request).customer
+        if not customer:
+            return Response({'error': 'Only customers can checkout.'}, status=status.HTTP_403_FORBIDDEN)
+        
+        try:
+            job = CheckoutJob.objects.select_related('order').get(id=job_id, customer=customer)
+        except CheckoutJob.DoesNotExist:
+            return Response({'error': 'Checkout job not found.'}, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response(job_status(job))
+        
+def _parse_bool(value, name, default):
+    """Parse an optional ``true``/``false`` query parameter."""
+    if value in (None, ''):
+        return default
+    if value.lower() in ('1', 'true', 'yes'):
+        return True
+    if value.lower() in ('0', 'false', 'no'):
+        return False
+    raise ValueError(f"{name} must be true or false")
+
+
 class CustomerOrdersView(APIView):
     """
     Endpoint to get orders for a customer
+
+    Query parameters (all optional):
+        limit, cursor    keyset pagination, newest first; ``next`` holds the
+                         URL of the following page
+        include_items    false to leave out the flat ``items`` list (the same
+                         lines are still grouped under ``vendors``)
+        summary          true to return order headers only
+
+    A page costs three queries at most: the total count, the orders, and
+    their line items (one query on ``Contain``, which holds the price and
+    names at checkout, falling back to the item for lines that predate the
+    snapshot; skipped in summary mode, where item and vendor counts come from
+    the vendor sub-orders).
     """
     permission_classes = [IsAuthenticated]
+    max_page_size = 100
     
     def get(self, request):
         # Check if user is a customer
-        if not hasattr(request.user, 'customer'):
+        if not get_role(request).is_customer:
             return Response(
                 {"error": "Only customers can access this endpoint"}, 
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        customer = request.user.customer
+        customer = get_role(request).customer
         
-        # Get all orders for this customer
-        orders = Order.objects.filter(customer=customer).order_by('-date')
+        params = request.query_params
+        try:
+            limit = parse_limit(params.get('limit'), None, self.max_page_size)
+            cursor = params.get('cursor')
+            after = decode_date_id_cursor(cursor) if cursor else None
+            include_items = _parse_bool(params.get('include_items'), 'include_items', True)
+            summary = _parse_bool(params.get('summary'), 'summary', False)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Get this page of the customer's orders
+        orders = Order.objects.filter(customer=customer).order_by('-date', '-id')
+        total_orders = orders.count()
+        if after is not None:
+            orders = orders.filter(older_than(*after))
+        if summary:
+            orders = orders.annotate(
+                item_count=Sum('vendor_orders__item_count'),
+                vendor_count=Count('vendor_orders'),
+            )
+        
+        orders = list(orders[:limit + 1] if limit is not None else orders)
+        has_more = limit is not None and len(orders) > limit
+        orders = orders[:limit]
+        
+        # All line items of the page in one query, grouped in a single pass
+        lines = {}
+        if not summary:
+            for oc in (Contain.objects
+                       .filter(order_id__in=[order.id for order in orders])
+                       .order_by('id')):
+                lines.setdefault(oc.order_id, []).append(oc)
         
         orders_data = []
         
         for order in orders:
-            # Get all items in this order with their details
-            order_contains = Contain.objects.filter(order=order).select_related('item', 'item__vendor')
-            
-            # Get item details
-            items_details = []
-            for oc in order_contains:
-                items_details.append({
-                    "itemId": oc.item.id,
-                    "itemName": oc.item.name,
-                    "quantity": oc.quantity,
-                    "price": float(oc.item.price),
-                    "subtotal": float(oc.item.price * oc.quantity),
-                    "vendorName": oc.item.vendor.name,
-                    "vendorId": oc.item.vendor.id,
-                    "description": oc.item.description or ""
-                })
-            
-            # Group items by vendor for better organization
-            vendors_data = {}
-            for item in items_details:
-                vendor_id = item['vendorId']
-                vendor_name = item['vendorName']
-                
-                if vendor_id not in vendors_data:
-                    vendors_data[vendor_id] = {
-                        "vendorId": vendor_id,
-                        "vendorName": vendor_name,
-                        "items": [],
-                        "vendorTotal": 0
-                    }
-                
-                vendors_data[vendor_id]["items"].append({
-                    "itemId": item["itemId"],
-                    "itemName": item["itemName"],
-                    "quantity": item["quantity"],
-                    "price": item["price"],
-                    "subtotal": item["subtotal"],
-                    "description": item["description"]
-                })
-                vendors_data[vendor_id]["vendorTotal"] += item["subtotal"]
-            
-            # Convert vendors_data dict to list
-            vendors_list = list(vendors_data.values())
-            
             # Build order data with comment
             order_data = {
                 "orderId": order.id,
@@ -581,18 +931,53 @@ class CustomerOrdersView(APIView):
                 "status": order.status or "Pending",
                 "paymentMethod": order.payment_method or "Cash",
                 "comment": order.comment or "",  # NEW: Include comment in response
-                "itemCount": sum(item["quantity"] for item in items_details),
-                "vendorCount": len(vendors_data),
-                "items": items_details,  # All items in a flat list
-                "vendors": vendors_list  # Items grouped by vendor
             }
             
+            if summary:
+                order_data["itemCount"] = order.item_count or 0
+                order_data["vendorCount"] = order.vendor_count
+                orders_data.append(order_data)
+                continue
+            
+            items_details = []
+            vendors_data = {}
+            for oc in lines.get(order.id, []):
+                item = {
+                    "itemId": oc.item_id,
+                    "itemName": oc.item_name,
+                    "quantity": oc.quantity,
+                    "price": float(oc.unit_price),
+                    "subtotal": float(oc.unit_price * oc.quantity),
+                    "description": oc.item_description or ""
+                }
+                
+                # Group items by vendor for better organization
+                if oc.vendor_id not in vendors_data:
+                    vendors_data[oc.vendor_id] = {
+                        "vendorId": oc.vendor_id,
+                        "vendorName": oc.vendor_name,
+                        "items": [],
+                        "vendorTotal": 0
+                    }
+                vendors_data[oc.vendor_id]["items"].append(item)
+                vendors_data[oc.vendor_id]["vendorTotal"] += item["subtotal"]
+                
+                if include_items:
+                    items_details.append({**item, "vendorName": oc.vendor_name, "vendorId": oc.vendor_id})
+            
+            order_data["itemCount"] = sum(oc.quantity for oc in lines.get(order.id, []))
+            order_data["vendorCount"] = len(vendors_data)
+            if include_items:
+                order_data["items"] = items_details  # All items in a flat list
+            order_data["vendors"] = list(vendors_data.values())  # Items grouped by vendor
+            
             orders_data.append(order_data)
         
         # Add summary data
         response_data = {
             "orders": orders_data,
-            "totalOrders": len(orders_data),
+            "totalOrders": total_orders,
+            "next": None,
             "customerInfo": {
                 "customerId": customer.id,
                 "customerName": customer.name,
@@ -600,8 +985,64 @@ class CustomerOrdersView(APIView):
             }
         }
         
+        if has_more:
+            last = orders[-1]
+            response_data["next"] = next_page_url(request, encode_cursor(last.date, last.id))
+        
         return Response(response_data)
         
+class CustomerOrderCancelView(APIView):
+    """
+    Cancel a pending order: its reserved daily stock is released and its
+    vendors are notified on their order streams
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, order_id):
+        customer = get_role(request).customer
+        if not customer:
+            return Response({"error": "Only customers can access this endpoint"}, status=status.HTTP_403_FORBIDDEN)
+        
+        try:
+            order = cancel_order(order_id, customer)
+        except Order.DoesNotExist:
+            return Response({"error": "Order not found"}, status=status.HTTP_404_NOT_FOUND)
+        except OrderNotCancellableError as e:
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
+        
+        return Response({
+            "message": "Order cancelled",
+            "orderId": order.id,
+            "status": order.status
+        })
+
+
+class ItemStockView(APIView):
+    """
+    Units left today for items with a daily stock limit: ``?item=1,2,3``
+    """
+    permission_classes = [IsAuthenticated]
+    max_items = 200
+
+    def get(self, request):
+        try:
+            item_ids = _parse_id_list(request.query_params.get('item'))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if not item_ids:
+            return Response({"error": "item is required"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(item_ids) > self.max_items:
+            return Response({"error": f"At most {self.max_items} items per request"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        items = list(Item.objects.filter(id__in=item_ids).only('id', 'daily_stock_limit').order_by('id'))
+        remaining = stock_levels(items)
+        return Response([{
+            "itemId": item.id,
+            "dailyLimit": item.daily_stock_limit,
+            "remaining": remaining.get(item.id)
+        } for item in items])
+
+
 class VendorMenuView(APIView):
     """
     GET: Retrieve vendor's own menus with items
@@ -612,47 +1053,26 @@ class VendorMenuView(APIView):
     def get(self, request):
         """Get all menus and items for the authenticated vendor"""
         # Check if user is a vendor
-        if not hasattr(request.user, 'vendor'):
+        if not get_role(request).is_vendor:
             return Response(
                 {"error": "Only vendors can access their menus"}, 
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        vendor = request.user.vendor
+        vendor = get_role(request).vendor
         
-        # Get all menus for this vendor
-        menus = Menu.objects.filter(vendor=vendor).order_by('-date')
-        
-        menus_data = []
-        
-        for menu in menus:
-            # Get all items for this menu
-            items = Item.objects.filter(menu=menu)
-            
-            items_data = []
-            for item in items:
-                # Get categories for this item
-                categories = list(item.categories.values_list('name', flat=True))
-                
-                item_data = {
-                    "itemId": item.id,
-                    "itemName": item.name,
-                    "price": float(item.price),
-                    "description": item.description or "",
-                    "categories": categories
-                }
-                
-                items_data.append(item_data)
-            
-            menu_data = {
-                "menuId": menu.id,
-                "menuName": menu.name,
-                "date": menu.date,
-                "itemCount": len(items_data),
-                "items": items_data
+        # Build this vendor's tree in a fixed number of queries, newest menu first
+        tree = build_vendor_trees([vendor.id]).get(vendor.id, {"menus": []})
+        menus_data = [
+            {
+                "menuId": menu["menuId"],
+                "menuName": menu["menuName"],
+                "date": menu["date"],
+                "itemCount": len(menu["items"]),
+                "items": menu["items"]
             }
-            
-            menus_data.append(menu_data)
+            for menu in sorted(tree["menus"], key=lambda menu: menu["date"], reverse=True)
+        ]
         
         response_data = {
             "vendorInfo": {
@@ -670,13 +1090,13 @@ class VendorMenuView(APIView):
     def post(self, request):
         """Create a new menu with items for the authenticated vendor"""
         # Check if user is a vendor
-        if not hasattr(request.user, 'vendor'):
+        if not get_role(request).is_vendor:
             return Response(
                 {"error": "Only vendors can create menus"}, 
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        vendor = request.user.vendor
+        vendor = get_role(request).vendor
         
         # Extract data from request
         menu_name = request.data.get('menu_name')
@@ -716,6 +1136,14 @@ class VendorMenuView(APIView):
                     {"error": f"Item {i+1}: price must be a valid number"}, 
                     status=status.HTTP_400_BAD_REQUEST
                 )
+            
+            try:
+                parse_daily_limit(item_data.get('daily_limit'))
+            except ValueError as e:
+                return Response(
+                    {"error": f"Item {i+1}: {e}"}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
         
         try:
             with transaction.atomic():
@@ -725,40 +1153,32 @@ class VendorMenuView(APIView):
                     name=menu_name
                 )
                 
-                created_items = []
-                
-                # Create items for the menu
-                for item_data in items_data:
-                    item = Item.objects.create(
+                # Every item and category link goes in with one INSERT each
+                entries = [
+                    (Item(
                         vendor=vendor,
                         menu=menu,
                         name=item_data['name'],
                         price=float(item_data['price']),
-                        description=item_data.get('description', '')
-                    )
-                    
-                    # Handle categories if provided
-                    categories_data = item_data.get('categories', [])
-                    created_categories = []
-                    
-                    for category_name in categories_data:
-                        if category_name.strip():  # Only create non-empty categories
-                            category = Category.objects.create(
-                                item=item,
-                                name=category_name.strip(),
-                                description=f"Category for {item.name}"
-                            )
-                            created_categories.append(category_name.strip())
-                    
-                    item_response_data = {
+                        description=item_data.get('description', ''),
+                        daily_stock_limit=parse_daily_limit(item_data.get('daily_limit'))
+                    ), clean_category_names(item_data.get('categories')))
+                    for item_data in items_data
+                ]
+                create_menu_items(entries)
+                touch_vendor(vendor.id)
+                
+                created_items = [
+                    {
                         "itemId": item.id,
                         "itemName": item.name,
                         "price": float(item.price),
                         "description": item.description,
-                        "categories": created_categories
+                        "categories": categories,
+                        "dailyLimit": item.daily_stock_limit
                     }
-                    
-                    created_items.append(item_response_data)
+                    for item, categories in entries
+                ]
                 
                 # Prepare success response
                 response_data = {
@@ -781,6 +1201,28 @@ class VendorMenuView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+def _menu_items(menu):
+    """``(item, category names)`` for every item of ``menu``, in two queries."""
+    categories = {}
+    for item_id, name in (ItemCategory.objects
+                          .filter(item__menu=menu)
+                          .order_by('id')
+                          .values_list('item_id', 'category__name')):
+        categories.setdefault(item_id, []).append(name)
+    return [(item, categories.get(item.id, []))
+            for item in Item.objects.filter(menu=menu).order_by('id')]
+
+
+def _menu_item_data(item, categories):
+    return {
+        "itemId": item.id,
+        "itemName": item.name,
+        "price": float(item.price),
+        "description": item.description or "",
+        "categories": categories
+    }
+
+
 class VendorMenuDetailView(APIView):
     """
     GET: Retrieve a specific menu with its items
@@ -791,32 +1233,19 @@ class VendorMenuDetailView(APIView):
     
     def get(self, request, menu_id):
         """Get a specific menu with its items"""
-        if not hasattr(request.user, 'vendor'):
+        if not get_role(request).is_vendor:
             return Response(
                 {"error": "Only vendors can access their menus"}, 
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        vendor = request.user.vendor
+        vendor = get_role(request).vendor
         
         # Get the menu and ensure it belongs to the vendor
         menu = get_object_or_404(Menu, id=menu_id, vendor=vendor)
         
-        # Get all items for this menu
-        items = Item.objects.filter(menu=menu)
-        
-        items_data = []
-        for item in items:
-            categories = list(item.categories.values_list('name', flat=True))
-            
-            item_data = {
-                "itemId": item.id,
-                "itemName": item.name,
-                "price": float(item.price),
-                "description": item.description or "",
-                "categories": categories
-            }
-            items_data.append(item_data)
+        # All items of this menu with their categories (two queries)
+        items_data = [_menu_item_data(item, categories) for item, categories in _menu_items(menu)]
         
         menu_data = {
             "menuId": menu.id,
@@ -830,13 +1259,13 @@ class VendorMenuDetailView(APIView):
     
     def put(self, request, menu_id):
         """Update menu name and/or add new items"""
-        if not hasattr(request.user, 'vendor'):
+        if not get_role(request).is_vendor:
             return Response(
                 {"error": "Only vendors can update their menus"}, 
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        vendor = request.user.vendor
+        vendor = get_role(request).vendor
         
         # Get the menu and ensure it belongs to the vendor
         menu = get_object_or_404(Menu, id=menu_id, vendor=vendor)
@@ -852,6 +1281,49 @@ class VendorMenuDetailView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        # Validate every new item before writing anything
+        entries = []
+        if new_items_data and isinstance(new_items_data, list):
+            for item_data in new_items_data:
+                if not item_data.get('name') or not item_data.get('name').strip():
+                    return Response(
+                        {"error": "Item name is required and cannot be empty"}, 
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                
+                if not item_data.get('price'):
+                    return Response(
+                        {"error": "Item price is required"}, 
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                
+                try:
+                    price = float(item_data.get('price'))
+                    if price < 0:
+                        return Response(
+                            {"error": "Item price cannot be negative"}, 
+                            status=status.HTTP_400_BAD_REQUEST
+                        )
+                except (TypeError, ValueError):
+                    return Response(
+                        {"error": "Item price must be a valid number"}, 
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                
+                try:
+                    daily_limit = parse_daily_limit(item_data.get('daily_limit'))
+                except ValueError as e:
+                    return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+                
+                entries.append((Item(
+                    vendor=vendor,
+                    menu=menu,
+                    name=item_data['name'].strip(),
+                    price=price,
+                    description=item_data.get('description', '').strip(),
+                    daily_stock_limit=daily_limit
+                ), clean_category_names(item_data.get('categories'))))
+        
         try:
             with transaction.atomic():
                 # Update menu name if provided - ONLY update the name field
@@ -861,85 +1333,17 @@ class VendorMenuDetailView(APIView):
                         menu.name = new_name
                         menu.save(update_fields=['name'])  # FIXED: Only update name field, leave date untouched
                 
-                created_items = []
-                
-                # Add new items if provided
-                if new_items_data and isinstance(new_items_data, list):
-                    for item_data in new_items_data:
-                        # Validate item data
-                        if not item_data.get('name') or not item_data.get('name').strip():
-                            return Response(
-                                {"error": "Item name is required and cannot be empty"}, 
-                                status=status.HTTP_400_BAD_REQUEST
-                            )
-                        
-                        if not item_data.get('price'):
-                            return Response(
-                                {"error": "Item price is required"}, 
-                                status=status.HTTP_400_BAD_REQUEST
-                            )
-                        
-                        try:
-                            price = float(item_data.get('price'))
-                            if price < 0:
-                                return Response(
-                                    {"error": "Item price cannot be negative"}, 
-                                    status=status.HTTP_400_BAD_REQUEST
-                                )
-                        except (TypeError, ValueError):
-                            return Response(
-                                {"error": "Item price must be a valid number"}, 
-                                status=status.HTTP_400_BAD_REQUEST
-                            )
-                        
-                        # Create the item
-                        item = Item.objects.create(
-                            vendor=vendor,
-                            menu=menu,
-                            name=item_data['name'].strip(),
-                            price=price,
-                            description=item_data.get('description', '').strip()
-                        )
-                        
-                        # Handle categories if provided
-                        categories_data = item_data.get('categories', [])
-                        created_categories = []
-                        
-                        if categories_data:
-                            for category_name in categories_data:
-                                if category_name and category_name.strip():
-                                    category = Category.objects.create(
-                                        item=item,
-                                        name=category_name.strip(),
-                                        description=f"Category for {item.name}"
-                                    )
-                                    created_categories.append(category_name.strip())
-                        
-                        item_response_data = {
-                            "itemId": item.id,
-                            "itemName": item.name,
-                            "price": float(item.price),
-                            "description": item.description,
-                            "categories": created_categories
-                        }
-                        
-                        created_items.append(item_response_data)
+                # Read the items already on the menu (two queries) before adding
+                # the new ones, whose response data is already in hand
+                existing = _menu_items(menu)
                 
-                # Get updated menu data
-                all_items = Item.objects.filter(menu=menu)
-                all_items_data = []
+                if entries:
+                    create_menu_items(entries)
+                touch_vendor(vendor.id)
                 
-                for item in all_items:
-                    categories = list(item.categories.values_list('name', flat=True))
-                    
-                    item_data = {
-                        "itemId": item.id,
-                        "itemName": item.name,
-                        "price": float(item.price),
-                        "description": item.description or "",
-                        "categories": categories
-                    }
-                    all_items_data.append(item_data)
+                all_items_data = [
+                    _menu_item_data(item, item_categories) for item, item_categories in existing + entries
+                ]
                 
                 response_data = {
                     "message": "Menu updated successfully",
@@ -950,7 +1354,7 @@ class VendorMenuDetailView(APIView):
                         "itemCount": len(all_items_data),
                         "items": all_items_data
                     },
-                    "newItemsAdded": len(created_items)
+                    "newItemsAdded": len(entries)
                 }
                 
                 return Response(response_data, status=status.HTTP_200_OK)
@@ -963,20 +1367,22 @@ class VendorMenuDetailView(APIView):
     
     def delete(self, request, menu_id):
         """Delete a menu"""
-        if not hasattr(request.user, 'vendor'):
+        if not get_role(request).is_vendor:
             return Response(
                 {"error": "Only vendors can delete their menus"}, 
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        vendor = request.user.vendor
+        vendor = get_role(request).vendor
         
         # Get the menu and ensure it belongs to the vendor
         menu = get_object_or_404(Menu, id=menu_id, vendor=vendor)
         
         try:
             menu_name = menu.name
-            menu.delete()
+            with transaction.atomic():
+                menu.delete()
+                touch_vendor(vendor.id)
             
             return Response(
                 {"message": f"Menu '{menu_name}' deleted successfully"}, 
@@ -998,13 +1404,13 @@ class VendorMenuItemView(APIView):
     def delete(self, request, menu_id, item_id):
         """Delete a specific item from a menu"""
         # Check if user is a vendor
-        if not hasattr(request.user, 'vendor'):
+        if not get_role(request).is_vendor:
             return Response(
                 {"error": "Only vendors can delete menu items"}, 
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        vendor = request.user.vendor
+        vendor = get_role(request).vendor
         
         try:
             # Get the menu and ensure it belongs to the vendor
@@ -1041,7 +1447,9 @@ class VendorMenuItemView(APIView):
                 )
             
             # Delete the item (categories will be deleted automatically due to CASCADE)
-            item.delete()
+            with transaction.atomic():
+                item.delete()
+                touch_vendor(vendor.id)
             
             # Get updated menu statistics
             remaining_items = Item.objects.filter(menu=menu).count()
@@ -1066,4 +1474,149 @@ class VendorMenuItemView(APIView):
             return Response(
                 {"error": f"Failed to delete item: {str(e)}"}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+            )
+
+
+# Request content types accepted by the menu import, by file format
+MENU_FILE_TYPES = {
+    'text/csv': 'csv',
+    'application/x-ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+}
+
+
+class VendorMenuImportView(APIView):
+    """
+    POST: Create menus from a CSV or NDJSON body, one row per item (see api/menu_io.py)
+    
+    The body is parsed line by line and committed in chunks, so a menu of any
+    size can be sent in one request.
+    """
+    permission_classes = [IsAuthenticated]
+    chunk_size = 500
+    
+    def post(self, request):
+        if not get_role(request).is_vendor:
+            return Response(
+                {"error": "Only vendors can import menus"}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        vendor = get_role(request).vendor
+        fmt = MENU_FILE_TYPES.get(request.content_type.split(';')[0].strip().lower())
+        if fmt is None:
+            return Response(
+                {"error": f"Send the menu file as one of: {', '.join(MENU_FILE_TYPES)}"}, 
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+        
+        # Read the raw body as it arrives instead of parsing it into request.data
+        stream = request.stream
+        lines = (line.decode('utf-8-sig') for line in stream) if stream is not None else iter(())
+        result = import_menu_rows(vendor, read_records(lines, fmt), self.chunk_size)
+        
+        summary = result.summary()
+        if result.error:
+            return Response(summary, status=status.HTTP_400_BAD_REQUEST)
+        if not result.menus:
+            summary["error"] = "No menus or items were imported"
+            return Response(summary, status=status.HTTP_400_BAD_REQUEST)
+        return Response(summary, status=status.HTTP_201_CREATED)
+
+
+class VendorMenuExportView(APIView):
+    """
+    GET: Stream the vendor's menus, items and categories as NDJSON or, with ?type=csv, CSV
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        if not get_role(request).is_vendor:
+            return Response(
+                {"error": "Only vendors can export their menus"}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        vendor = get_role(request).vendor
+        fmt = request.query_params.get('type', 'ndjson')
+        if fmt not in CONTENT_TYPES:
+            return Response(
+                {"error": f"type must be one of: {', '.join(CONTENT_TYPES)}"}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        lines = render_rows(export_menu_rows(vendor), fmt)
+        if hasattr(request, 'scope'):
+            # Under ASGI a sync iterator would be read into memory before sending
+            lines = iterate_in_thread(lines)
+        response = StreamingHttpResponse(lines, content_type=CONTENT_TYPES[fmt])
+        response['Content-Disposition'] = f'attachment; filename="menus-{vendor.id}.{fmt}"'
+        return response
+
+class AuthCacheStatsView(APIView):
+    """
+    Counters of this worker's token authentication cache, for monitoring
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(token_cache.stats())
+
+
+class VendorOrderStreamView(View):
+    """
+    Server-sent events stream of new orders for the authenticated vendor
+
+    Replaces polling vendor/orders/: an ``order.created`` event is pushed as
+    soon as a checkout containing the vendor's items commits. Comment lines
+    are sent as heartbeats so proxies keep the connection open.
+
+    Only works when served through the ASGI application (myrecipe/asgi.py).
+    Browsers' EventSource cannot set headers, so besides
+    ``Authorization: Token <key>`` the token may be passed as ``?token=<key>``.
+    """
+    heartbeat_interval = 15
+    
+    async def get(self, request):
+        if not hasattr(request, 'scope'):
+            return JsonResponse(
+                {"error": "Order streaming requires the ASGI server"}, 
+                status=status.HTTP_501_NOT_IMPLEMENTED
+            )
+        
+        key = request.GET.get('token', '')
+        auth = request.headers.get('Authorization', '').split()
+        if len(auth) == 2 and auth[0] == 'Token':
+            key = auth[1]
+        
+        token = await Token.objects.select_related('user').filter(key=key).afirst() if key else None
+        if token is None or not token.user.is_active:
+            return JsonResponse(
+                {"error": "Invalid token."}, 
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        
+        vendor = await Vendor.objects.filter(user_id=token.user_id).afirst()
+        if vendor is None:
+            return JsonResponse(
+                {"error": "Only vendors can access this endpoint"}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        response = StreamingHttpResponse(self.stream(vendor), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # don't let nginx buffer the stream
+        return response
+    
+    async def stream(self, vendor):
+        subscription = broker.subscribe(vendor_channel(vendor.id))
+        try:
+            yield f"retry: 3000\nevent: ready\ndata: {json.dumps({'vendorId': vendor.id})}\n\n"
+            while True:
+                event = await subscription.get(timeout=self.heartbeat_interval)
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            subscription.close()
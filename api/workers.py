@@ -0,0 +1,13 @@
+"""
+Helpers for management commands that fan work out to a process pool.
+"""
+import django
+from django.db import connections
+
+
+def init_worker_process():
+    """``ProcessPoolExecutor`` initializer that prepares Django in each child."""
+    # Children started with spawn/forkserver import nothing; forked ones
+    # must not reuse the parent's database connection
+    django.setup()
+    connections.close_all()
@@ -3,6 +3,10 @@ ASGI config for myrecipe project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Long-lived streams such as the vendor order feed (api/vendor/orders/stream/)
+need this entry point, e.g. ``uvicorn myrecipe.asgi:application``; the WSGI
+application answers them with 501.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -89,6 +91,13 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock when a transaction starts, so concurrent
+            # checkouts queue up instead of racing (select_for_update is a
+            # no-op on SQLite), and wait for it rather than fail at once.
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
@@ -100,14 +109,89 @@ DATABASES = {
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
 }
 
+# Token -> user lookups cached by CachedTokenAuthentication (see
+# api/authentication.py). Set SHARED_CACHE to a cache alias to share them
+# between worker processes.
+TOKEN_AUTH_CACHE = {
+    'MAX_ENTRIES': 10000,
+    'TIMEOUT': 60,
+    'SHARED_CACHE': None,
+}
+
+# Emails are queued in the OutboxEmail table and delivered by the send_outbox
+# command (see api/outbox.py) through EMAIL_BACKEND. For local testing use the
+# console backend or 'django.core.mail.backends.filebased.EmailBackend', which
+# writes each message to a file under EMAIL_FILE_PATH.
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+EMAIL_FILE_PATH = os.path.join(tempfile.gettempdir(), 'myrecipe-emails')
+EMAIL_OUTBOX = {
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 6,
+    'RETRY_DELAY': 30,
+    'MAX_RETRY_DELAY': 60 * 60,
+    'LEASE': 5 * 60,
+}
+
+# Compiled catalog file memory-mapped by every worker (see api/catalog_file.py),
+# e.g. BASE_DIR / 'catalog.bin'. Leave as None to serve the customer catalog
+# from each worker's in-memory snapshot instead.
+CATALOG_FILE = None
+
+# How long the first response to an Idempotency-Key is kept for replay
+# (see api/idempotency.py); prune_idempotency_keys deletes older ones.
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
+# Queue every checkout for the process_checkouts worker and answer 202
+# (see api/checkout_jobs.py); clients can also opt in per request with
+# ?async=true. The worker is a separate process, so its order.created events
+# reach vendor order streams only through a shared EVENT_BROKER (e.g.
+# api.events.SQLiteBackend); process_checkouts refuses to start with
+# ASYNC_CHECKOUT on and the in-process broker, and warns otherwise.
+ASYNC_CHECKOUT = False
+
+# Counter rows per item and day for daily stock limits (see api/inventory.py).
+# Shards only help on a database with row locks (PostgreSQL, MySQL), where 8
+# lets concurrent checkouts of one item proceed in parallel. SQLite serializes
+# every write transaction, so one row is as fast and simpler.
+STOCK_COUNTER_SHARDS = 1
+
+# Active carts live in the 'carts' cache and are written behind to the
+# database (see api/cart_store.py). The cache must be shared by every worker
+# process, and with several processes should be memcached or Redis, whose
+# atomic add() makes the per-cart edit lock exact; the file-based cache is
+# fine for a single process. Use 'api.cart_store.DatabaseCartStore' to skip
+# the cache.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'carts': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'myrecipe-carts'),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+CART_STORE = {
+    'BACKEND': 'api.cart_store.CacheCartStore',
+    'OPTIONS': {'cache': 'carts', 'write_behind': 5},
+}
+
+# Pub/sub backend for pushed order events (see api/events.py). With several
+# ASGI worker processes, share events through a local SQLite file instead:
+# EVENT_BROKER = {
+#     'BACKEND': 'api.events.SQLiteBackend',
+#     'OPTIONS': {'path': BASE_DIR / 'events.sqlite3'},
+# }
+EVENT_BROKER = {
+    'BACKEND': 'api.events.InProcessBackend',
+}
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators